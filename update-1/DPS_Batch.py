@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+#MIT License
+#
+#Copyright (c) 2019 TheHWcave
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+#
+
+
+#
+# Runs DPS_Control.py for many (script, port) jobs at the same time. The 
+# jobs are listed in a manifest file, one job per line:
+#
+#	# script			port			hub	 more DPS_Control options
+#	charge.txt			/dev/ttyUSB0	A	 --history 5000
+#	charge.txt			/dev/ttyUSB1	A
+#	ramp.txt			COM7			-	 --columnar npz
+#
+# Jobs for the same port run one after the other, jobs for different ports
+# run in parallel, each in its own process. The hub column groups ports 
+# that share an USB hub, at most --per-hub jobs of the same hub run at 
+# the same time ('-' = no limit). Every job runs in its own directory 
+# below the batch directory, so its recordings and console output 
+# (log.txt) are kept apart. At the end a summary of all jobs is shown 
+# and saved in summary.csv
+#
+
+import argparse, os, sys, shlex, subprocess, threading
+from time import localtime,strftime,perf_counter
+
+# exit codes of DPS_Control.py
+RESULTS = {0:'OK', 1:'ERROR', 2:'PROTECTION', 3:'WATCHDOG'}
+
+class Job:
+	"""
+		one line of the manifest
+	"""
+	__slots__ = ('num','script','port','hub','options','dir','start','duration','code')
+
+	def __init__(self,num,script,port,hub,options):
+		self.num	 = num
+		self.script	 = script
+		self.port	 = port
+		self.hub	 = hub
+		self.options = options
+		self.dir	 = ''
+		self.start	 = 0.0
+		self.duration= 0.0
+		self.code	 = None
+
+	def result(self):
+		if self.code == None: return 'NOT RUN'
+		return RESULTS.get(self.code,'FAILED ('+str(self.code)+')')
+
+def read_manifest(fname):
+	"""
+		reads the manifest and returns a list of jobs. Script names are 
+		relative to the manifest. Raises ValueError for a bad line
+	"""
+	jobs = []
+	base = os.path.dirname(os.path.abspath(fname))
+	with open(fname,'r') as f:
+		for (n,line) in enumerate(f,1):
+			com = line.find('#')
+			if com >= 0: line = line[:com]
+			words = shlex.split(line)
+			if len(words) == 0: continue
+			if len(words) < 3:
+				raise ValueError('line {:d}: need script, port and hub'.format(n))
+			script = os.path.join(base,words[0])
+			if not os.path.exists(script):
+				raise ValueError('line {:d}: {:s} not found'.format(n,words[0]))
+			jobs.append(Job(len(jobs)+1,script,words[1],words[2],words[3:]))
+	return jobs
+
+class DPS_Batch:
+	"""
+		runs a list of jobs with one worker thread per port. Each worker 
+		starts DPS_Control.py as a separate process for each of its jobs and
+		waits for it to finish
+	"""
+	
+	__jobs		= []
+	__outdir	= ''
+	__perhub	= 2
+	__hubs		= {}		# semaphore for each hub
+	__control	= ''		# path of DPS_Control.py
+	__t0		= 0.0		# time the batch started
+	__wall		= 0.0		# total run time of the batch
+	__printlock	= None
+	
+	def __init__(self,jobs,outdir,perhub=2):
+		self.__jobs	  = jobs
+		self.__outdir = outdir
+		self.__perhub = perhub
+		self.__hubs	  = {}
+		for j in jobs:
+			if j.hub != '-' and perhub > 0 and j.hub not in self.__hubs:
+				self.__hubs[j.hub] = threading.BoundedSemaphore(perhub)
+		self.__control	 = os.path.join(os.path.dirname(os.path.abspath(__file__)),'DPS_Control.py')
+		self.__printlock = threading.Lock()
+		
+	def __log(self,text):
+		with self.__printlock:
+			print(strftime('%H:%M:%S',localtime())+' '+text)
+			sys.stdout.flush()
+		
+	def __run_job(self,job):
+		"""
+			runs one job in its own directory and keeps its exit code
+		"""
+		name = '{:03d}_{:s}_{:s}'.format(job.num,
+				os.path.splitext(os.path.basename(job.script))[0],
+				os.path.basename(job.port))
+		job.dir = os.path.join(self.__outdir,name)
+		os.makedirs(job.dir,exist_ok=True)
+		cmd = [sys.executable,self.__control,job.script,'-p',job.port] + job.options
+		hub = self.__hubs.get(job.hub)
+		if hub != None: hub.acquire()
+		try:
+			self.__log('start  #{:d} {:s} on {:s}'.format(job.num,os.path.basename(job.script),job.port))
+			job.start = perf_counter()
+			with open(os.path.join(job.dir,'log.txt'),'w') as log:
+				try:
+					job.code = subprocess.call(cmd,cwd=job.dir,stdout=log,stderr=subprocess.STDOUT)
+				except OSError as err:
+					log.write(str(err)+'\n')
+					job.code = -1
+			job.duration = perf_counter() - job.start
+		finally:
+			if hub != None: hub.release()
+		self.__log('end    #{:d} {:s} on {:s}: {:s} after {:.1f}s'.format(job.num,
+				os.path.basename(job.script),job.port,job.result(),job.duration))
+			
+	def __worker(self,jobs):
+		"""
+			runs all jobs of one port, one after the other
+		"""
+		for job in jobs: self.__run_job(job)
+		
+	def run(self):
+		"""
+			runs all jobs and returns when they are done
+		"""
+		byport = {}
+		for j in self.__jobs: byport.setdefault(j.port,[]).append(j)
+		workers = [threading.Thread(target=self.__worker,args=(jobs,),name=port) 
+					for (port,jobs) in byport.items()]
+		self.__t0 = perf_counter()
+		for w in workers: w.start()
+		for w in workers: w.join()
+		self.__wall = perf_counter() - self.__t0
+		
+	def summary(self,fname):
+		"""
+			saves the result of every job in a .CSV file and returns a text
+			with the totals and the speed-up against running all jobs one
+			after the other
+		"""
+		with open(fname,'w') as f:
+			f.write('Job,Script,Port,Hub,Options,Directory,Start[s],Duration[s],Exit,Result\n')
+			for j in self.__jobs:
+				f.write('{:d},{:s},{:s},{:s},"{:s}",{:s},{:.3f},{:.3f},{:s},{:s}\n'.format(
+						j.num,j.script,j.port,j.hub,' '.join(j.options),j.dir,j.start-self.__t0,
+						j.duration,str(j.code),j.result()))
+		total = sum(j.duration for j in self.__jobs)
+		ok	  = sum(1 for j in self.__jobs if j.code == 0)
+		text  = '{:d} jobs, {:d} ok, {:d} failed. Wall clock {:.1f}s, sum of jobs {:.1f}s'.format(
+				len(self.__jobs),ok,len(self.__jobs)-ok,self.__wall,total)
+		if self.__wall > 0: text = text + ', speed-up {:.2f}x'.format(total/self.__wall)
+		return text
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description='runs DPS_Control.py for all jobs in a manifest')
+	parser.add_argument(help='manifest filename',
+						dest='manifest',action='store',type=str)
+	parser.add_argument('--out','-o',help='directory for the results (default=batch_<date-time>)',
+						dest='outdir',action='store',type=str,default='')
+	parser.add_argument('--per-hub',help='jobs running at the same time on one hub (default=2, 0 = no limit)',
+						dest='perhub',action='store',type=int,default=2)
+	arg = parser.parse_args()
+	try:
+		jobs = read_manifest(arg.manifest)
+	except (OSError,ValueError) as err:
+		print(arg.manifest+': '+str(err))
+		exit(1)
+	outdir = arg.outdir
+	if outdir == '': outdir = 'batch_'+strftime('%Y%m%d%H%M%S',localtime())
+	os.makedirs(outdir,exist_ok=True)
+	B = DPS_Batch(jobs,os.path.abspath(outdir),arg.perhub)
+	B.run()
+	print(B.summary(os.path.join(outdir,'summary.csv')))
+	exit(0 if all(j.code == 0 for j in jobs) else 1)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+#MIT License
+#
+#Copyright (c) 2019 TheHWcave
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+#
+
+
+#
+# Measures the start-up cost of the interpreter when it is used as a 
+# library: the time to import DPS_Interpreter in a fresh Python process
+# and the time to load (compile) a short program. Both are compared with
+# a budget, the exit code is 1 if one of them is over budget. Loading 
+# from the parse cache (__dpscache__) is shown as well
+#
+# With --port the program is also run on a real module that many times 
+# and the average time per run is shown
+#
+# It also measures the Python side of a Modbus transaction (encoding the
+# request, reading and decoding the response) against a loopback that 
+# answers instantly: the time per transaction and the memory allocated 
+# for it (tracemalloc)
+#
+
+import argparse, os, sys, subprocess, tracemalloc
+from time import perf_counter
+
+IMPORT_BUDGET	= 0.150		# seconds for importing DPS_Interpreter
+LOAD_BUDGET		= 0.002		# seconds for loading a short program
+TRANS_BUDGET	= 0.000050	# seconds for the Python side of a transaction
+ALLOC_BUDGET	= 640		# peak bytes allocated during a transaction (mostly the decoded values)
+
+SHORT_PROGRAM = """
+		SET		V 5
+		SET		C 0.1
+		OUTPUT	ON
+		WAIT	0
+		OUTPUT	OFF
+"""
+
+def import_time(tries=5):
+	"""
+		returns the shortest time of several fresh processes to import 
+		DPS_Interpreter (the Python start-up itself is not included)
+	"""
+	code = ('from time import perf_counter as p; t = p(); import DPS_Interpreter; '
+			'print(p() - t)')
+	here = os.path.dirname(os.path.abspath(__file__))
+	env = dict(os.environ)
+	env['PYTHONPATH'] = here + os.pathsep + env.get('PYTHONPATH','')
+	best = None
+	for n in range(tries):
+		out = subprocess.check_output([sys.executable,'-c',code],env=env,cwd=here)
+		t = float(out.decode().split()[-1])
+		if best == None or t < best: best = t
+	return best
+	
+def load_time(fname,runs,cache=False):
+	"""
+		returns the average time to load (compile) the program fname. With
+		cache the program comes from the parse cache, except the first time
+	"""
+	from DPS_Interpreter import DPS_Interpreter
+	from DPS_Handler import DPS_Handler
+	I = DPS_Interpreter(DPS_Handler('',19200),None,debug=0,cache=cache)
+	if cache: I.load(fname)
+	t = perf_counter()
+	for n in range(runs): I.load(fname)
+	return (perf_counter() - t) / runs
+	
+def run_time(fname,port,runs):
+	"""
+		returns the average time to load and run the program fname on the
+		module at port
+	"""
+	from DPS_Interpreter import run_script
+	from DPS_Handler import DPS_Handler
+	DH = DPS_Handler(port,19200)
+	DH.Connect()
+	t = perf_counter()
+	for n in range(runs): run_script(fname,DH,checkpoint=0.0)
+	return (perf_counter() - t) / runs
+	
+class Loopback:
+	"""
+		stands in for DPS_Connection: every request is answered with a 
+		prepared response, so only the handler itself is measured
+	"""
+	on_reconnect = None
+	
+	def __init__(self,handler_module):
+		def frame(body):
+			crc = 0xffff
+			for b in body: crc = (crc >> 8) ^ handler_module.CRC_TABLE[(crc ^ b) & 0xff]
+			return bytes(body) + crc.to_bytes(2,'little')
+		# the answers to reading n registers
+		self.__reads = {n:memoryview(frame(bytes([1,3,2*n]) + bytes(range(2*n)))) for n in (2,3,8,9,10)}
+		self.__out = self.__reads[9]
+		self.__pos = 0
+		self.drop = False		# True: the next write reconnects first
+		self.log = None			# list: copies of all written frames are added
+		
+	def open(self): pass
+	def get_outages(self): return []
+	
+	def write(self,msg):
+		if self.drop:
+			# like DPS_Connection after reopening a lost port
+			self.drop = False
+			if self.on_reconnect != None: self.on_reconnect()
+		if self.log != None: self.log.append(bytes(msg))
+		# a write is answered with the request itself
+		self.__out = self.__reads[msg[5]] if msg[1] == 3 else msg
+		self.__pos = 0
+		return True
+		
+	def readinto(self,buf):
+		n = min(len(buf),len(self.__out) - self.__pos)
+		buf[:n] = self.__out[self.__pos:self.__pos+n]
+		self.__pos = self.__pos + n
+		return n
+
+def transaction_cost(runs):
+	"""
+		returns (seconds, bytes) per transaction for reading the values and
+		writing a register: the average time and the peak of the memory 
+		allocated during one transaction
+	"""
+	import DPS_Handler
+	DH = DPS_Handler.DPS_Handler('',19200,Loopback(DPS_Handler))
+	DH.Set_Cache(0)
+	ops = (DH.Read_Output_Values, lambda: DH.Set_USET(1.23))
+	for op in ops: op()
+	t = perf_counter()
+	for n in range(runs):
+		for op in ops: op()
+	dt = (perf_counter() - t) / runs / len(ops)
+	tracemalloc.start()
+	peak = 0
+	for op in ops:
+		op()
+		for n in range(100):
+			base = tracemalloc.get_traced_memory()[0]
+			tracemalloc.reset_peak()
+			op()
+			peak = max(peak,tracemalloc.get_traced_memory()[1] - base)
+	tracemalloc.stop()
+	return (dt,peak)
+	
+def reconnect_check():
+	"""
+		the connection comes back while a write is sent. Returns True if 
+		the write still reached the module unchanged and the state was read 
+		again after it
+	"""
+	import DPS_Handler
+	LB = Loopback(DPS_Handler)
+	DH = DPS_Handler.DPS_Handler('',19200,LB)
+	LB.log = []
+	LB.drop = True
+	res = DH.Set_USET(1.23)
+	# the USET write first, then the read of the 10 registers
+	return (res and len(LB.log) == 2 and LB.log[0][:6] == bytes([1,6,0,0,0,123]) and 
+			LB.log[1][:6] == bytes([1,3,0,0,0,10]))
+	
+def check(text,value,budget):
+	res = 'ok' if value <= budget else 'OVER BUDGET'
+	print('{:s}: {:.2f}ms (budget {:.2f}ms) {:s}'.format(text,value*1000,budget*1000,res))
+	return value <= budget
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description='measures the start-up time of the DPS interpreter')
+	parser.add_argument('--prog',help='program to load (default: a short built-in one)',
+						dest='prog',action='store',type=str,default='')
+	parser.add_argument('--runs','-n',help='number of loads or runs (default=1000)',
+						dest='runs',action='store',type=int,default=1000)
+	parser.add_argument('--port','-p',help='also run the program on the module at this port',
+						dest='port',action='store',type=str,default='')
+	arg = parser.parse_args()
+	fname = arg.prog
+	if fname == '':
+		fname = 'DPS_Bench_prog.tmp'
+		with open(fname,'w') as f: f.write(SHORT_PROGRAM)
+	try:
+		ok = check('import DPS_Interpreter',import_time(),IMPORT_BUDGET)
+		ok = check('load program',load_time(fname,arg.runs),LOAD_BUDGET) and ok
+		print('load program from the cache: {:.2f}ms'.format(load_time(fname,arg.runs,True)*1000))
+		(dt,peak) = transaction_cost(arg.runs*10)
+		ok = check('transaction',dt,TRANS_BUDGET) and ok
+		res = 'ok' if peak <= ALLOC_BUDGET else 'OVER BUDGET'
+		print('transaction memory: {:d} bytes (budget {:d} bytes) {:s}'.format(peak,ALLOC_BUDGET,res))
+		ok = peak <= ALLOC_BUDGET and ok
+		res = reconnect_check()
+		print('reconnect during a write: '+('ok' if res else 'FAILED'))
+		ok = res and ok
+		if arg.port != '':
+			print('load and run program: {:.2f}ms'.format(run_time(fname,arg.port,max(1,arg.runs//100))*1000))
+	finally:
+		if arg.prog == '': 
+			os.remove(fname)
+			from DPS_Parser import CACHE_DIR
+			cdir = os.path.join(os.path.dirname(os.path.abspath(fname)),CACHE_DIR)
+			try:
+				os.remove(os.path.join(cdir,fname+'.pickle'))
+				os.rmdir(cdir)		# only if nothing else is cached there
+			except OSError: pass
+	exit(0 if ok else 1)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+#MIT License
+#
+#Copyright (c) 2019 TheHWcave
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+#
+
+import serial
+from time import perf_counter
+
+class DPS_Connection:
+	"""
+		Serial connection to the DPS module that survives the port going 
+		away. The port is opened on first use (or with open()). If a read or
+		write fails (USB re-enumeration, Bluetooth drop ..) the connection 
+		is marked as lost and following writes try to reopen it, waiting 
+		longer after each failed attempt (exponential backoff). A write 
+		before the next attempt is due fails right away: the caller holds
+		the handler's lock, so waiting here would also hold up the watchdog.
+		The caller can wait retry_delay() itself before it tries again.
+		
+		The port is located again by the USB VID and serial number it had 
+		when it was first opened, because after a re-enumeration it may come
+		back under a different name. After a successful reopen the 
+		on_reconnect function is called so the owner can re-sync its state.
+	"""
+	
+	BACKOFF_MIN = 0.1	# first wait before trying to reopen
+	BACKOFF_MAX = 10.0	# longest wait between two attempts
+	
+	__port		= ''
+	__speed		= 19200
+	__timeout	= 0.01
+	__ser		= None		# pyserial port, None if not open
+	__vid		= None		# USB VID of the port, if it is an USB port
+	__serno		= None		# USB serial number of the port
+	__lost		= None		# time the connection was lost, None if not lost
+	__backoff	= 0.0		# present wait time between attempts
+	__nexttry	= 0.0		# time of the next reopen attempt
+	__outages	= []		# list of outage durations in seconds
+	
+	on_reconnect = None		# function called after a successful reopen
+	
+	def __init__(self,port,speed,timeout=0.01):
+		self.__port		= port
+		self.__speed	= speed
+		self.__timeout	= timeout
+		self.__outages	= []
+		
+	def __identify(self):
+		"""
+			remembers VID and serial number of the port (if it has them)
+		"""
+		try:
+			import serial.tools.list_ports
+			for p in serial.tools.list_ports.comports():
+				if p.device == self.__port:
+					self.__vid	 = p.vid
+					self.__serno = p.serial_number
+					break
+		except ImportError: pass
+		
+	def __locate(self):
+		"""
+			returns the name of the port with the remembered VID and serial
+			number, or the original name if it can't be found
+		"""
+		if self.__vid == None: return self.__port
+		try:
+			import serial.tools.list_ports
+			found = [p.device for p in serial.tools.list_ports.comports()
+						if p.vid == self.__vid and p.serial_number == self.__serno]
+		except ImportError: 
+			found = []
+		if self.__port in found or len(found) != 1: return self.__port
+		return found[0]
+	
+	def open(self):
+		"""
+			opens the port. Raises serial.SerialException if that fails
+		"""
+		self.__ser = serial.Serial(port = self.__port,
+						baudrate=self.__speed,
+						timeout = self.__timeout)
+		if self.__vid == None: self.__identify()
+		
+	def close(self):
+		if self.__ser != None:
+			try:
+				self.__ser.close()
+			except (serial.SerialException,OSError): pass
+			self.__ser = None
+	
+	def is_open(self): return self.__ser != None
+	
+	def get_port(self): return self.__port
+	
+	def get_outages(self): return list(self.__outages)
+	
+	def retry_delay(self):
+		"""
+			returns the seconds until the next reopen attempt, 0 if the 
+			connection isn't lost or an attempt is due
+		"""
+		if self.__lost == None: return 0.0
+		return max(self.__nexttry - perf_counter(),0.0)
+	
+	def __fail(self,err):
+		"""
+			marks the connection as lost
+		"""
+		self.close()
+		if self.__lost == None:
+			self.__lost = perf_counter()
+			self.__backoff = self.BACKOFF_MIN
+			self.__nexttry = self.__lost
+			print('connection to '+self.__port+' lost: '+str(err))
+		
+	def __reopen(self):
+		"""
+			tries to reopen a lost connection, if the backoff time is over.
+			Returns True if the port is open again
+		"""
+		if self.__lost == None:
+			# never opened before, just open it
+			try:
+				self.open()
+				return True
+			except (serial.SerialException,OSError) as err:
+				self.__fail(err)
+				return False
+		if perf_counter() < self.__nexttry: return False
+		self.__port = self.__locate()
+		try:
+			self.open()
+		except (serial.SerialException,OSError):
+			self.__backoff = min(self.__backoff * 2,self.BACKOFF_MAX)
+			self.__nexttry = perf_counter() + self.__backoff
+			return False
+		dur = perf_counter() - self.__lost
+		self.__outages.append(dur)
+		self.__lost = None
+		print('connection to '+self.__port+' back after {:.1f}s'.format(dur))
+		if self.on_reconnect != None: self.on_reconnect()
+		return True
+		
+	def write(self,msg):
+		"""
+			sends msg. Any bytes still waiting in the input buffer (for
+			example from an interrupted exchange) are dropped first. Returns
+			False if the connection is not available
+		"""
+		if self.__ser == None and not self.__reopen(): return False
+		try:
+			if self.__ser.in_waiting > 0: self.__ser.reset_input_buffer()
+			self.__ser.write(msg)
+			return True
+		except (serial.SerialException,OSError) as err:
+			self.__fail(err)
+			return False
+			
+	def readinto(self,buf):
+		"""
+			reads up to len(buf) bytes into buf (a bytearray or memoryview),
+			returns the number of bytes read, 0 on timeout or if the 
+			connection is not available
+		"""
+		if self.__ser == None: return 0
+		try:
+			return self.__ser.readinto(buf) or 0
+		except (serial.SerialException,OSError) as err:
+			self.__fail(err)
+			return 0
+			
+	def read(self,n):
+		"""
+			reads up to n bytes, returns b'' on timeout or if the connection
+			is not available
+		"""
+		if self.__ser == None: return b''
+		try:
+			return self.__ser.read(n)
+		except (serial.SerialException,OSError) as err:
+			self.__fail(err)
+			return b''
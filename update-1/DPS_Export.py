@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+#MIT License
+#
+#Copyright (c) 2019 TheHWcave
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+#
+
+import zipfile, json, sys
+from array import array
+
+#
+# Columnar export of recordings. Every channel is stored as its own typed 
+# array so analysis programs can load only the channels they need. 
+#
+#	.npz		NumPy archive: one .npy file per channel plus meta.json. This
+#				format is written without needing NumPy, load it with
+#				numpy.load(). The metadata comes back as bytes with
+#				json.loads(npz['meta.json'])
+#	.parquet	Apache Parquet, needs pyarrow. The metadata is stored in the
+#				schema metadata under the key 'dps'
+#
+
+			# channel name, array typecode, numpy type 
+COLUMNS = (	('time',  'd','<f8'),
+			('uset',  'd','<f8'),
+			('iset',  'd','<f8'),
+			('uout',  'd','<f8'),
+			('iout',  'd','<f8'),
+			('pout',  'd','<f8'),
+			('uin',   'd','<f8'),
+			('prot',  'b','|i1'),
+			('cvcc',  'b','|i1'),
+			('calls', 'l','<i4'),
+			('epoch', 'd','<f8'),		# wall clock time of the sample (Unix time)
+			('rtt',   'd','<f8'))		# time between request and response of the reading in ms
+
+def new_columns():
+	"""
+		returns a dictionary with an empty array for each channel
+	"""
+	return {c[0]:array(c[1]) for c in COLUMNS}
+
+def __npy(arr,descr):
+	"""
+		returns the .npy file contents (format version 1.0) of a 1D array
+	"""
+	if descr == '<i4' and arr.itemsize != 4: arr = array('i',arr)
+	if sys.byteorder != 'little': 
+		arr = array(arr.typecode,arr)
+		arr.byteswap()
+	hdr = "{'descr': '"+descr+"', 'fortran_order': False, 'shape': ("+str(len(arr))+",), }"
+	# magic + version + header length + header must be a multiple of 64
+	hdr = hdr + ' '*(63 - (10 + len(hdr)) % 64) + '\n'
+	return b'\x93NUMPY\x01\x00' + len(hdr).to_bytes(2,'little') + hdr.encode('latin1') + arr.tobytes()
+
+def write_npz(fname,cols,meta):
+	"""
+		writes the channel arrays cols and the metadata dictionary meta into
+		a NumPy .npz file
+	"""
+	with zipfile.ZipFile(fname,'w',zipfile.ZIP_DEFLATED) as z:
+		for (name,tc,descr) in COLUMNS:
+			z.writestr(name+'.npy',__npy(cols[name],descr))
+		z.writestr('meta.json',json.dumps(meta,indent=1))
+
+def write_parquet(fname,cols,meta):
+	"""
+		writes the channel arrays cols and the metadata dictionary meta into
+		a Parquet file. Needs pyarrow
+	"""
+	import pyarrow, pyarrow.parquet
+	types = {'<f8':pyarrow.float64(),'|i1':pyarrow.int8(),'<i4':pyarrow.int32()}
+	tab = pyarrow.table({name:pyarrow.array(cols[name],type=types[descr]) for (name,tc,descr) in COLUMNS})
+	tab = tab.replace_schema_metadata({'dps':json.dumps(meta)})
+	pyarrow.parquet.write_table(tab,fname)
+
+def write_columns(fname,cols,meta):
+	"""
+		writes a columnar file, the format is selected by the file extension
+	"""
+	if fname.lower().endswith('.parquet'): write_parquet(fname,cols,meta)
+	else: write_npz(fname,cols,meta)
+
+def read_csv(fname):
+	"""
+		reads a REC_xxx.csv recording. Returns (cols, calls) with calls being
+		the list of [row, calls, res, cmt] for all rows with a call result or
+		comment
+	"""
+	cols = new_columns()
+	calls = []
+	with open(fname,'r') as f:
+		head = f.readline()
+		if not head.startswith('Time[s],USET[V]'):
+			raise ValueError(fname+' is not a recording file')
+		# older recordings have no Epoch and RTT columns
+		nt = 12 if 'Epoch[s]' in head else 10
+		for line in f:
+			v = line.rstrip('\n').split(',',nt+1)
+			if len(v) < nt: continue
+			for n in range(7): cols[COLUMNS[n][0]].append(float(v[n]))
+			cols['prot'].append(int(v[7]))
+			cols['cvcc'].append(int(v[8]))
+			cols['calls'].append(int(v[9]))
+			cols['epoch'].append(float(v[10]) if nt > 10 else float('nan'))
+			cols['rtt'].append(float(v[11]) if nt > 10 else float('nan'))
+			res = v[nt].strip() if len(v) > nt else ''
+			cmt = v[nt+1].strip() if len(v) > nt+1 else ''
+			if res != '' or cmt != '': calls.append([len(cols['time'])-1,int(v[9]),res,cmt])
+	return (cols,calls)
+
+
+if __name__ == "__main__":
+	#
+	# converts REC_xxx.csv recordings into columnar files
+	#
+	import argparse, os
+	parser = argparse.ArgumentParser()
+	parser.add_argument(help='recording file(s) (REC_xxx.csv)',nargs='+',
+						dest='inp_names',action='store',type=str)
+	parser.add_argument('--format','-f',help='npz (default) or parquet',
+						dest='format',action='store',type=str,default='npz')
+	parser.add_argument('--meta','-m',help='extra metadata as key=value, can be repeated',
+						dest='meta',action='append',type=str,default=[])
+	arg = parser.parse_args()
+	for fn in arg.inp_names:
+		try:
+			(cols,calls) = read_csv(fn)
+		except ValueError as err:
+			print('skipped: '+str(err))
+			continue
+		meta = {'source':fn,'calls':calls}
+		for m in arg.meta:
+			(k,_,v) = m.partition('=')
+			meta[k] = v
+		out = os.path.splitext(fn)[0]+'.'+arg.format
+		write_columns(out,cols,meta)
+		print(fn+' -> '+out+' ('+str(len(cols['time']))+' rows)')
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+#MIT License
+#
+#Copyright (c) 2019 TheHWcave
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+#
+
+
+import ast, marshal
+from math import sqrt
+
+#
+# Arithmetic expressions for the script language. An expression is 
+# checked and compiled once by the parser. Parts that don't depend on a 
+# variable are calculated right away (constant folding), an expression 
+# without any variable becomes a plain number. 
+#
+
+FUNCS = {'MIN':min, 'MAX':max, 'ABS':abs, 'ROUND':round, 'SQRT':sqrt}
+
+_globals = dict(FUNCS,__builtins__={})	# what an expression can see besides the variables
+
+# ** is calculated with floats, so a huge power overflows (an error) 
+# instead of taking forever as a Python int
+_binops = {ast.Add:lambda a,b: a+b, ast.Sub:lambda a,b: a-b,
+			ast.Mult:lambda a,b: a*b, ast.Div:lambda a,b: a/b,
+			ast.FloorDiv:lambda a,b: a//b, ast.Mod:lambda a,b: a%b,
+			ast.Pow:lambda a,b: float(a)**b}
+_unops  = {ast.UAdd:lambda a: +a, ast.USub:lambda a: -a}
+
+MAX_CONST = 1e15	# largest value of a constant part that gets folded
+
+class ExprError(ValueError):
+	"""
+		an expression can't be calculated with the present values of its
+		variables (a division by 0 ..)
+	"""
+	pass
+
+class Expr(str):
+	"""
+		a compiled expression. It is still the original text (so it can be 
+		printed like any other parameter), float() evaluates it with the 
+		variables in env (see bind) and raises ExprError if that fails
+	"""
+	env = {}				# variables, set for each program with bind
+	
+	def __new__(cls,text,code,names):
+		self = str.__new__(cls,text)
+		self.code  = code	# code object, or the value if it is constant
+		self.names = names	# variable names used 
+		return self
+		
+	def __reduce__(self):
+		# code objects can't be pickled, marshal them instead
+		if self.names: return (_load,(str(self),marshal.dumps(self.code),self.names))
+		return (_load,(str(self),None,self.code))
+		
+	def __float__(self):
+		if not self.names: return float(self.code)
+		try:
+			return float(eval(self.code,_globals,self.env))
+		except (ArithmeticError,TypeError,ValueError) as err:
+			raise ExprError('expression error in '+str(self)+': '+str(err))
+
+def bind(param,env):
+	"""
+		makes the expressions in param (an Expr, or a tuple that can hold 
+		some) use the variables env. Each interpreter binds its program to
+		its own variables
+	"""
+	if isinstance(param,Expr): 
+		param.env = env
+	elif isinstance(param,tuple):
+		for p in param: bind(p,env)
+
+def _load(text,code,names):
+	"""
+		rebuilds a pickled Expr
+	"""
+	if code == None: return Expr(text,names,())
+	return Expr(text,marshal.loads(code),names)
+
+def _constant(value,node):
+	"""
+		returns value as a constant node in place of node. Raises
+		ValueError if the value is too large (or not a number at all)
+	"""
+	if isinstance(value,complex): raise ValueError('not a real number')
+	if not -MAX_CONST <= value <= MAX_CONST: raise ValueError('number too large')
+	return ast.copy_location(ast.Constant(value),node)
+
+def _fold(node):
+	"""
+		checks the syntax tree of an expression and replaces every part
+		without variables by its value. Raises ValueError for anything that
+		isn't a number, a variable, + - * / // % **, or one of FUNCS
+	"""
+	if isinstance(node,ast.Constant):
+		if type(node.value) not in (int,float): raise ValueError('not a number: '+repr(node.value))
+		return node
+	if isinstance(node,ast.Name):
+		if node.id in FUNCS: raise ValueError(node.id+' is a function')
+		return node
+	if isinstance(node,ast.BinOp) and type(node.op) in _binops:
+		node.left  = _fold(node.left)
+		node.right = _fold(node.right)
+		if isinstance(node.left,ast.Constant) and isinstance(node.right,ast.Constant):
+			return _constant(_binops[type(node.op)](node.left.value,node.right.value),node)
+		return node
+	if isinstance(node,ast.UnaryOp) and type(node.op) in _unops:
+		node.operand = _fold(node.operand)
+		if isinstance(node.operand,ast.Constant):
+			return _constant(_unops[type(node.op)](node.operand.value),node)
+		return node
+	if (isinstance(node,ast.Call) and isinstance(node.func,ast.Name) and node.func.id in FUNCS 
+		and not node.keywords):
+		node.args = [_fold(a) for a in node.args]
+		if all(isinstance(a,ast.Constant) for a in node.args):
+			return _constant(FUNCS[node.func.id](*[a.value for a in node.args]),node)
+		return node
+	raise ValueError('not allowed in an expression: '+ast.dump(node)[:40])
+
+def compile_expr(text):
+	"""
+		compiles an expression (upper case, like everything in the script)
+		and returns it as Expr. Raises ValueError if the expression is not 
+		valid or can't be calculated (for example a division by 0)
+	"""
+	try:
+		tree = ast.parse(text.upper(),mode='eval')
+		tree.body = _fold(tree.body)
+		ast.fix_missing_locations(tree)
+		names = tuple(sorted({n.id for n in ast.walk(tree) if isinstance(n,ast.Name) and n.id not in FUNCS}))
+		if names: return Expr(text,compile(tree,'<expr>','eval'),names)
+		return Expr(text,float(tree.body.value),names)
+	except OverflowError:
+		raise ValueError('number too large')
+	except (SyntaxError,ArithmeticError,TypeError,ValueError) as err:
+		raise ValueError(str(err))
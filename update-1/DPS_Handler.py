@@ -22,12 +22,94 @@
 #SOFTWARE.
 #
 
-import serial
+import threading, struct
+from DPS_Connection import DPS_Connection
 from time import sleep,time,localtime,strftime,perf_counter
 
+def crc_table():
+	"""
+		returns the table for the Modbus CRC16 (polynomial 0xa001): the 
+		result of the 8 shift steps for every possible low byte
+	"""
+	tab = []
+	for n in range(256):
+		crc = n
+		for b in range(8):
+			if (crc & 0x0001) != 0:
+				crc = (crc >> 1) ^ 0xa001
+			else:
+				crc = crc >> 1
+		tab.append(crc)
+	return tuple(tab)
+
+CRC_TABLE	= crc_table()
+FRAME_HEAD	= struct.Struct('>BBHH')	# slave, function, register, count or value
+FRAME_CRC	= struct.Struct('<H')		# the checksum is sent low byte first
+REGS2		= struct.Struct('>2H')		# register values in a response
+REGS3		= struct.Struct('>3H')
+REGS8		= struct.Struct('>8H')
+REGS9		= struct.Struct('>9H')
+REGS10		= struct.Struct('>10H')
+
+class Sample(tuple):
+	"""
+		One reading of the module: the raw register values USET .. CVCC as 
+		the module sent them and the clock() times of the request and of the 
+		complete response. A Sample can't be changed, so the recorder, the 
+		conditions, the history and the listeners all share the same object 
+		instead of copying its values. The values are only scaled to volts, 
+		amps and watts when they are asked for (uset, iout ..)
+	"""
+	__slots__ = ()
+	
+	USET	= 0		# index of the raw values, in register order
+	ISET	= 1
+	UOUT	= 2
+	IOUT	= 3
+	POUT	= 4
+	UIN		= 5
+	LOCK	= 6
+	PROT	= 7
+	CVCC	= 8
+	TREQ	= 9		# clock() when the request was sent
+	TRES	= 10	# clock() when the response was complete
+	
+	@property
+	def uset(self):	return self[0] / 100
+	@property
+	def iset(self):	return self[1] / 1000
+	@property
+	def uout(self):	return self[2] / 100
+	@property
+	def iout(self):	return self[3] / 1000
+	@property
+	def pout(self):	return self[4] / 100
+	@property
+	def uin(self):	return self[5] / 100
+	@property
+	def lock(self):	return self[6]
+	@property
+	def prot(self):	return self[7]
+	@property
+	def cvcc(self):	return self[8]
+	@property
+	def t(self):	return (self[9] + self[10]) / 2	# best guess when the module sampled
+	@property
+	def rtt(self):	return self[10] - self[9]
+	
+	def replace(self,index,raw):
+		"""
+			returns a copy with the raw value at index replaced 
+		"""
+		s = list(self)
+		s[index] = raw
+		return Sample(s)
+
+NO_SAMPLE	= Sample((0,0,0,0,0,0,0,0,0,0.0,0.0))	# before the first reading
+
 class DPS_Handler:
 
-	__DPS  = None		# serial connection to the DPS
+	__DPS  = None		# DPS_Connection to the DPS
 	
 	SLAVEADD	= 1		# address of the DPS module
 	
@@ -57,6 +139,14 @@ class DPS_Handler:
 	REG_M_MPRE	= 0x56  # set preset number
 	REG_M_SIN	= 0x57  # set power switch
 	
+						# the fields of a preset group in register order with 
+						# their scale (register value = value * scale)
+	PRESET_FIELDS = ('USET','ISET','OVP','OCP','OPP','BLED','MPRE','SIN')
+	PRESET_SCALE  = (100, 1000, 100, 1000, 100, 1, 1, 1)
+	
+	REG_NAMES	= {REG_USET:'USET', REG_ISET:'ISET', REG_ONOFF:'ONOFF', REG_M_SOVP:'OVP', 
+				   REG_M_SOCP:'OCP', REG_M_SOPP:'OPP', REG_EXTRACT:'EXTRACT'}
+	
 	#
 	# 	The class keeps copies of the actual values in the DPS module here
 	#   Note that all these values are updated based on responses from the
@@ -65,19 +155,40 @@ class DPS_Handler:
 	#	voltage from the SET_USET command but on the plus side, we are 
 	#   sure that that whatever uset shows is also what the module knows
 	#
-	__uset 		= 0.0	# last commanded voltage reported by DPS
-	__iset 		= 0.0	# last commanded current reported by DPS
-	__uout 		= 0.0	# present output voltage reported by DPS
-	__iout 		= 0.0	# present output current reported by DPS
-	__pout 		= 0.0	# present output wattage reported by DPS
+	__sample	= NO_SAMPLE	# last reading of USET .. CVCC (a Sample), written values included
 	__onoff		= 0		# present output state reported bt DPS
-	__uin		= 0.0	# present input voltage
-	__lock		= 0		# key lock  0 = not locked, 1 = locked
-	__protect 	= 0 	# 0 = no, 1 = OVP,  2 = OCP  3 = OPP
-	__cvcc		= 0		# 0 = CV  1 = CC
 	__ovp		= 0.0	# last commanded over-voltage protection reported by DPS
 	__ocp		= 0.0	# last commanded over-current protection reported by DPS
 	__opp		= 0.0	# last commanded over-power protection reported by DPS
+	__model		= 0		# model number, for example 5005
+	__version	= 0		# firmware version
+	__presets	= {}	# group -> tuple of PRESET_FIELDS values, as read or written 
+	__regs		= ()	# raw values of the last read of 8 registers (a preset group)
+	__treq		= 0.0	# clock() when the last read request was sent
+	
+	#
+	#	State cache: the register values the module confirmed (in a read
+	#	response or by acknowledging a write) with the time they were 
+	#	confirmed. A write of the value the module already has is skipped
+	#	as long as the confirmation is not older than __cacheage. A write
+	#	that failed leaves its register dirty, the module may or may not 
+	#	have the new value, so the next write always goes out
+	#
+	__confirmed	= {}	# register -> (raw value, clock() time of the confirmation)
+	__dirty		= None	# registers with an unconfirmed write
+	__elided	= {}	# register -> number of skipped writes
+	__writes	= 0		# number of successful writes so far
+	__resync	= False	# True: the connection was reopened, Sync_State after the present exchange
+	__cacheage	= 5.0	# seconds a confirmed value is trusted, 0 = always write
+	
+	__msg		= None	# request buffer for the fixed size requests (8 bytes)
+	__buf		= None	# response buffer
+	__bufview	= None	# memoryview of __buf to read into without copies
+	
+	__listeners = []	# functions called after each successful Read_Output_Values
+	__busy		= None	# only one thread at a time can talk to the module
+	
+	clock		= None	# returns the time in seconds, passed on to the listeners
 	
 	def __dump(self,prompt,buf):
 		"""
@@ -88,21 +199,30 @@ class DPS_Handler:
 			print('{:02x} '.format(b),end='')
 		print()
 
-	def __CRC16(self,buf):
+	def __CRC16(self,buf,n):
 		""" 
-			calculates and returns the CRC16 checksum for all message bytes 
-			excluding the two checksum bytes 
+			calculates and returns the CRC16 checksum of the first n bytes 
+			of buf, one table lookup per byte (see CRC_TABLE). For a message 
+			that ends with its (correct) checksum the result is 0
 		"""
 		crc = 0xffff
-		for b in buf[:-2]: # exclude the checksum space
-			crc = crc ^ b
-			for n in range(0,8):
-				if (crc & 0x0001) != 0:
-					crc = crc >> 1
-					crc = crc ^ 0xa001
-				else:
-					crc = crc >> 1
-		return crc.to_bytes(2,'little')
+		tab = CRC_TABLE
+		for i in range(n):
+			crc = (crc >> 8) ^ tab[(crc ^ buf[i]) & 0xff]
+		return crc
+	
+	def __send(self,msg,n,expected_len):
+		"""
+			adds the checksum to the first n bytes of msg, sends them and 
+			reads the response
+		"""
+		FRAME_CRC.pack_into(msg,n,self.__CRC16(msg,n))
+		res = self.__DPS.write(msg) and self.__read_response(expected_len)
+		if self.__resync:
+			# msg and the response buffer are free again
+			self.__resync = False
+			self.Sync_State()
+		return res
 	
 	def __cmd_read_regs(self,slave,regstart,regnum):
 		"""
@@ -114,14 +234,29 @@ class DPS_Handler:
 			The expected response for this message varies with regnum. 
 			For a regnum value of 5 we expect 15 bytes back
 		"""
-		msg = bytearray(8)
-		msg[0] = slave
-		msg[1] = 0x03
-		msg[2:4] = regstart.to_bytes(2,byteorder='big')
-		msg[4:6] = regnum.to_bytes(2,byteorder='big')
-		msg[6:8] = self.__CRC16(msg)
-		self.__DPS.write(msg)
-		res = self.__read_response(5+2*regnum)
+		with self.__busy:
+			FRAME_HEAD.pack_into(self.__msg,0,slave,0x03,regstart,regnum)
+			self.__treq = self.clock()
+			res = self.__send(self.__msg,6,5+2*regnum)
+		return res
+	
+	def __cmd_write_regs(self,slave,regstart,data):
+		"""
+			implements function code 0x10: write multiple registers
+			slave	: slave address
+			regstart: address of first register
+			data    : list of register values
+			
+			The expected response for this message is always 8 bytes long
+		"""
+		n = len(data)
+		msg = bytearray(9+2*n)
+		FRAME_HEAD.pack_into(msg,0,slave,0x10,regstart,n)
+		msg[6] = 2*n
+		struct.pack_into('>'+str(n)+'H',msg,7,*data)
+		with self.__busy:
+			res = self.__send(msg,7+2*n,8)
+			if res: self.__writes = self.__writes + 1
 		return res
 	
 	def __cmd_write_reg(self,slave,reg,data):
@@ -133,14 +268,10 @@ class DPS_Handler:
 			
 			The expected response for this message is always 8 bytes long
 		"""
-		msg = bytearray(8)
-		msg[0] = slave
-		msg[1] = 0x06
-		msg[2:4] = reg.to_bytes(2,byteorder='big')
-		msg[4:6] = data.to_bytes(2,byteorder='big')
-		msg[6:8] = self.__CRC16(msg)
-		self.__DPS.write(msg)
-		res = self.__read_response(8)
+		with self.__busy:
+			FRAME_HEAD.pack_into(self.__msg,0,slave,0x06,reg,data)
+			res = self.__send(self.__msg,6,8)
+			if res: self.__writes = self.__writes + 1
 		return res
 	
 	
@@ -154,22 +285,29 @@ class DPS_Handler:
 			really only targets the messages we are expecting to see, 
 			namely:
 				- response to read_regs for 9 registers starting at USET
+				- response to read_regs for 3 registers starting at UOUT
+				- response to read_regs for 2 registers starting at MODEL
+				- response to read_regs for 10 registers starting at USET
+				- response to read_regs for 8 registers of a preset group
+				- response to write_regs (a preset group)
 				  response to write_reg for changing USET
 				- response to write_reg for changing ISET
 				- response to write_reg for changing ONOFF
 			
+			The response is read into a buffer that is allocated once and 
+			decoded from there with struct, nothing is copied or sliced
 		"""
-		buf = bytearray(64)
+		buf = self.__buf
+		view = self.__bufview
 		buflen = 0
-		raw = bytearray
 		res = False
 		tries = 50
 		while (tries > 0):
-			raw = self.__DPS.read(32)
-			if len(raw) > 0:
-				# got something .. append in to the buffer
-				buf[buflen:buflen+len(raw)] = raw 
-				buflen = buflen + len(raw)
+			# ask for exactly the missing bytes, so the read returns as 
+			# soon as the response is complete 
+			n = self.__DPS.readinto(view[buflen:expected_len])
+			if n > 0:
+				buflen = buflen + n
 				if buflen >= expected_len:
 					break
 			else:
@@ -179,46 +317,91 @@ class DPS_Handler:
 		else:
 			#dump('msg:',buf[:buflen])
 			if buflen > 3:
-				if buf[-2:] == self.__CRC16(buf):
-					if buf[1:3] == b'\x03\x12': 
+				if self.__CRC16(buf,buflen) == 0:
+					fc = buf[1]
+					if fc == 0x03 and buf[2] == 0x12: 
 						# Expected response for read_regs of 9 registers starting with USET
 						# extract and format the 9 registers as USET,ISET,UOUT,IOUT,POUT,UIN,LOCK,PROT,CVCC
 						#    0   1   2   3   4   5   6   7   8   9  10  11  12  13  14  15  16  17  18  19  20  21  22
 						#  [sa][03][0a][ uset ][ iset ][ uout ][ iout ][ pout ][  uin ][ lock ][ prot ][ cvcc ][ crc16]
 						# 
-						self.__uset		= int.from_bytes(buf[3:5],byteorder='big') / 100
-						self.__iset		= int.from_bytes(buf[5:7],byteorder='big') / 1000
-						self.__uout		= int.from_bytes(buf[7:9],byteorder='big') / 100
-						self.__iout		= int.from_bytes(buf[9:11],byteorder='big') / 1000
-						self.__pout 	= int.from_bytes(buf[11:13],byteorder='big') / 100
-						self.__uin		= int.from_bytes(buf[13:15],byteorder='big') / 100
-						self.__lock		= int.from_bytes(buf[15:17],byteorder='big') 
-						self.__protect	= int.from_bytes(buf[17:19],byteorder='big')
-						self.__cvcc		= int.from_bytes(buf[19:21],byteorder='big')
+						s = Sample(REGS9.unpack_from(buf,3) + (self.__treq,self.clock()))
+						self.__sample = s
+						self.__confirm(self.REG_USET,s[Sample.USET])
+						self.__confirm(self.REG_ISET,s[Sample.ISET])
+						# a protection turns the output off by itself
+						if s[Sample.PROT] > 0: self.__confirmed.pop(self.REG_ONOFF,None)
 						
-						#print('{:05.2f}V {:05.3f}A {:05.2f}V {:05.3f}A {:5.2f}W'.format(uset,iset,uout,iout,pout))
-						#print('{:05.2f}V L={:02d} P={:02d} CVCC={:02d}'.format(self.__uin,self.__lock,self.__protect,self.__cvcc))
+						#print('{:05.2f}V {:05.3f}A {:05.2f}V {:05.3f}A {:5.2f}W'.format(s.uset,s.iset,s.uout,s.iout,s.pout))
+						#print('{:05.2f}V L={:02d} P={:02d} CVCC={:02d}'.format(s.uin,s.lock,s.prot,s.cvcc))
+						res = True
+					elif fc == 0x03 and buf[2] == 0x14: 
+						# Expected response for read_regs of 10 registers starting with USET
+						# same as above but with ONOFF as the 10th register. Used to
+						# re-sync all cached values after a reconnect
+						#    0   1   2   3   4       19  20  21  22  23  24
+						#  [sa][03][14][ uset ] .. [ cvcc ][ onoff][ crc16]
+						#
+						r = REGS10.unpack_from(buf,3)
+						s = Sample(r[:9] + (self.__treq,self.clock()))
+						self.__sample = s
+						self.__onoff = r[9]
+						self.__confirm(self.REG_USET,s[Sample.USET])
+						self.__confirm(self.REG_ISET,s[Sample.ISET])
+						self.__confirm(self.REG_ONOFF,self.__onoff)
+						res = True
+					elif fc == 0x03 and buf[2] == 0x10: 
+						# Expected response for read_regs of the 8 registers of a preset
+						# group. Which group it is only the caller knows, so the raw
+						# values are kept for Read_Preset
+						#    0   1   2   3   4       17  18  19  20
+						#  [sa][03][10][ uset ] .. [  sin ][ crc16]
+						#
+						self.__regs = REGS8.unpack_from(buf,3)
+						res = True
+					elif fc == 0x03 and buf[2] == 0x06: 
+						# Expected response for read_regs of 3 registers starting with UOUT
+						#    0   1   2   3   4   5   6   7   8   9  10
+						#  [sa][03][06][ uout ][ iout ][ pout ][ crc16]
+						#
+						s = self.__sample
+						self.__sample = Sample(s[:2] + REGS3.unpack_from(buf,3) + s[5:9] + (self.__treq,self.clock()))
+						res = True
+					elif fc == 0x03 and buf[2] == 0x04: 
+						# Expected response for read_regs of 2 registers starting with MODEL
+						#    0   1   2   3   4   5   6   7   8
+						#  [sa][03][04][ model][ vers ][ crc16]
+						#
+						(self.__model,self.__version) = REGS2.unpack_from(buf,3)
 						res = True
-					elif buf[1] == 0x06: 
+					elif fc == 0x06: 
 						# Expected response for write_reg 
 						# extract and format the response according to the register written 
 						#    0   1   2   3   4   5   
 						#  [sa][06][  reg  ][  val ][crc16]
 						# 
-						reg = int.from_bytes(buf[2:4],byteorder='big') 
-						val = int.from_bytes(buf[4:6],byteorder='big')
-						if reg == self.REG_USET		: self.__uset = val / 100 	# its the response to a USET command 
-						elif reg == self.REG_ISET	: self.__iset = val / 1000 	# its the response to a ISET command 
+						(reg,val) = REGS2.unpack_from(buf,2)
+						if reg == self.REG_USET		: self.__sample = self.__sample.replace(Sample.USET,val)	# its the response to a USET command 
+						elif reg == self.REG_ISET	: self.__sample = self.__sample.replace(Sample.ISET,val)	# its the response to a ISET command 
 						elif reg == self.REG_ONOFF	: self.__onoff= val 		# its the response to a ONOFF command 
 						elif reg == self.REG_M_SOVP	: self.__ovp  = val / 100	# its the response to a SOVP command 
 						elif reg == self.REG_M_SOCP	: self.__ocp  = val / 1000	# its the response to a SOCP command 
 						elif reg == self.REG_M_SOPP	: self.__opp  = val / 100	# its the response to a SOPP command 
+						elif reg == self.REG_EXTRACT: self.__recalled(val)		# its the response to a preset recall
+						if reg != self.REG_EXTRACT: self.__confirm(reg,val)
+						res = True
+					elif fc == 0x10: 
+						# Expected response for write_regs, the values themselves are
+						# taken over by Write_Preset
+						#    0   1   2   3   4   5   
+						#  [sa][10][  reg  ][  num ][crc16]
+						# 
 						res = True
 					else:
 						self.__dump('unknown valid msg:',buf[:buflen])
 				else:
 					self.__dump('bad checksum:',buf[:buflen])
-			elif len(buf) > 0:
+			elif buflen > 0:
 				self.__dump('not enough data:',buf[:buflen])
 		return res
 	
@@ -226,74 +409,313 @@ class DPS_Handler:
 	#  getters for the actual values from the module
 	#  
 	#   
-	def Get_USET(self):	return self.__uset 		# updated after Read_Output_Values or Set_USET
-	def Get_ISET(self):	return self.__iset 		# updated after Read_Output_Values or Set_ISET
-	def Get_UOUT(self):	return self.__uout 		# updated after Read_Output_Values
-	def Get_IOUT(self):	return self.__iout 		# updated after Read_Output_Values
-	def Get_POUT(self): return self.__pout 		# updated after Set_Power
-	def Get_UIN(self):	return self.__uin	 	# updated after Read_Output_Values
-	def Get_LOCK(self):	return self.__lock	 	# updated after Read_Output_Values
-	def Get_PROT(self):	return self.__protect 	# updated after Read_Output_Values
-	def Get_CVCC(self):	return self.__cvcc	 	# updated after Read_Output_Values
+	def Get_Sample(self):return self.__sample	# the values below as one Sample
+	def Get_USET(self):	return self.__sample.uset	# updated after Read_Output_Values or Set_USET
+	def Get_ISET(self):	return self.__sample.iset	# updated after Read_Output_Values or Set_ISET
+	def Get_UOUT(self):	return self.__sample.uout	# updated after Read_Output_Values
+	def Get_IOUT(self):	return self.__sample.iout	# updated after Read_Output_Values
+	def Get_POUT(self): return self.__sample.pout	# updated after Read_Output_Values
+	def Get_ONOFF(self):return self.__onoff	 	# updated after Set_Power
+	def Get_UIN(self):	return self.__sample.uin	# updated after Read_Output_Values
+	def Get_LOCK(self):	return self.__sample.lock	# updated after Read_Output_Values
+	def Get_PROT(self):	return self.__sample.prot	# updated after Read_Output_Values
+	def Get_CVCC(self):	return self.__sample.cvcc	# updated after Read_Output_Values
 	def Get_OVP(self):	return self.__ovp	 	# updated after Set_OVP
 	def Get_OCP(self):	return self.__ocp	 	# updated after Set_OCP
 	def Get_OPP(self):	return self.__opp	 	# updated after Set_OPP
+	def Get_MODEL(self):return self.__model	 	# updated after Read_Model
+	def Get_VERSION(self):return self.__version	# updated after Read_Model
+	def Get_TREQ(self):	return self.__sample[Sample.TREQ]	# updated after Read_Output_Values
+	def Get_TRES(self):	return self.__sample[Sample.TRES]	# updated after Read_Output_Values
+	def Get_RTT(self):	return self.__sample.rtt
+	def Get_TSAMPLE(self):return self.__sample.t	# best guess when the module sampled
+	
+	def __recalled(self,group):
+		"""
+			the module confirmed loading preset group into the active 
+			settings. If the group is known the cached settings follow 
+		"""
+		p = self.__presets.get(group)
+		if p == None: 
+			for reg in (self.REG_USET,self.REG_ISET,self.REG_M_SOVP,self.REG_M_SOCP,self.REG_M_SOPP):
+				self.__confirmed.pop(reg,None)
+			return
+		(self.__ovp,self.__ocp,self.__opp) = p[2:5]
+		s = self.__sample.replace(Sample.USET,round(p[0]*self.PRESET_SCALE[0]))
+		self.__sample = s.replace(Sample.ISET,round(p[1]*self.PRESET_SCALE[1]))
+		self.__presets[0] = p
+		for (reg,n) in ((self.REG_USET,0),(self.REG_ISET,1),(self.REG_M_SOVP,2),(self.REG_M_SOCP,3),(self.REG_M_SOPP,4)):
+			self.__confirm(reg,round(p[n]*self.PRESET_SCALE[n]))
+		
+	def __confirm(self,reg,val):
+		"""
+			notes that the module confirmed val for register reg
+		"""
+		self.__confirmed[reg] = (val,self.clock())
+		
+	def __set_reg(self,reg,val,force=False):
+		"""
+			writes val into register reg unless the module already confirmed
+			that value recently enough (see Set_Cache). force always writes
+		"""
+		if not force and self.__cacheage > 0 and reg not in self.__dirty:
+			c = self.__confirmed.get(reg)
+			if c != None and c[0] == val and self.clock() - c[1] <= self.__cacheage:
+				self.__elided[reg] = self.__elided.get(reg,0) + 1
+				return True
+		res = self.__cmd_write_reg(self.SLAVEADD,reg,val)
+		if res: self.__dirty.discard(reg)
+		else:	self.__dirty.add(reg)
+		return res
+		
+	def __reconnected(self):
+		"""
+			after a reconnect nothing is known about the module, it may 
+			even have been power cycled. Then everything is read again. 
+			This is called from inside the write of a request, so the read 
+			waits until that exchange is finished (see __send), it would 
+			overwrite the request in the shared buffer
+		"""
+		self.__confirmed.clear()
+		self.__resync = True
+		
+	def Set_Cache(self,maxage):
+		"""
+			maxage: seconds a value confirmed by the module is trusted to 
+					skip writing the same value again, 0 = always write
+		"""
+		self.__cacheage = maxage
+		
+	def Get_Writes(self): return self.__writes	# successful writes so far, skipped ones not included
+	
+	def Get_Elided(self):
+		"""
+			returns {register name: number of skipped writes}
+		"""
+		return {self.REG_NAMES.get(reg,hex(reg)):n for (reg,n) in self.__elided.items()}
+		
+	def Invalidate(self):
+		"""
+			forgets all confirmed values, the next write of every register
+			goes out (for example after the front panel was used)
+		"""
+		self.__confirmed.clear()
+	
+	def Read_Preset(self,group):
+		"""
+			reads all 8 registers of a preset group (0..9) with one message,
+			see Get_Preset for the result
+		"""
+		res = self.__cmd_read_regs(self.SLAVEADD,self.REG_M_USET+group*0x10,8)
+		if res: 
+			self.__presets[group] = tuple(v / s for (v,s) in zip(self.__regs,self.PRESET_SCALE))
+		return res
+	
+	def Get_Preset(self,group):
+		"""
+			returns the values of a preset group (see PRESET_FIELDS) as they 
+			were last read or written, or None if the group is not known yet
+		"""
+		return self.__presets.get(group)
+	
+	def In_Range(self,field,value):
+		"""
+			True if value (volts, amps or watts) fits the register of field 
+			(one of PRESET_FIELDS)
+		"""
+		return 0 <= round(value*self.PRESET_SCALE[self.PRESET_FIELDS.index(field)]) <= 0xFFFF
+	
+	def Diff_Preset(self,group,values):
+		"""
+			compares values (the first fields of PRESET_FIELDS, None = don't
+			care) with the known values of the group. Returns a list of 
+			(field, present value, new value) of the fields that differ, all 
+			of them if the group is not known 
+		"""
+		old = self.__presets.get(group)
+		res = []
+		for n in range(len(values)):
+			if values[n] == None: continue
+			new = round(values[n]*self.PRESET_SCALE[n])
+			if old == None or round(old[n]*self.PRESET_SCALE[n]) != new:
+				res.append((self.PRESET_FIELDS[n],None if old == None else old[n],new/self.PRESET_SCALE[n]))
+		return res
+	
+	def Write_Preset(self,group,values):
+		"""
+			writes the first fields of PRESET_FIELDS of a preset group with 
+			one message. None in values keeps the present value, which needs
+			the group to be known (see Read_Preset) 
+		"""
+		old = self.__presets.get(group)
+		if None in values:
+			if old == None:
+				if not self.Read_Preset(group): return False
+				old = self.__presets[group]
+			values = [old[n] if values[n] == None else values[n] for n in range(len(values))]
+		data = [round(values[n]*self.PRESET_SCALE[n]) for n in range(len(values))]
+		res = self.__cmd_write_regs(self.SLAVEADD,self.REG_M_USET+group*0x10,data)
+		if res:
+			new = tuple(d / s for (d,s) in zip(data,self.PRESET_SCALE))
+			if old != None: 
+				self.__presets[group] = new + old[len(new):]
+			elif len(new) == len(self.PRESET_FIELDS): 
+				self.__presets[group] = new
+			if group == 0 and len(new) >= 5:
+				# the protection values of group 0 are the active ones
+				(self.__ovp,self.__ocp,self.__opp) = new[2:5]
+				for (reg,n) in ((self.REG_M_SOVP,2),(self.REG_M_SOCP,3),(self.REG_M_SOPP,4)):
+					self.__confirm(reg,data[n])
+		return res
+	
+	def Recall_Preset(self,group):
+		"""
+			makes preset group (1..9) the active settings (USET, ISET, OVP, 
+			OCP, OPP ..) with a single write
+		"""
+		res = self.__cmd_write_reg(self.SLAVEADD,self.REG_EXTRACT,group)
+		return res
 	
 	def Read_Output_Values(self):
 		"""
-			get the present readings for USET,ISET,UOUT,IOUT, POUT .. CVCC
+			get the present readings for USET,ISET,UOUT,IOUT, POUT .. CVCC. 
+			Returns them as a Sample (None if the read failed), which is also 
+			passed to the listeners
 		"""
-		res = self.__cmd_read_regs(self.SLAVEADD,self.REG_USET,9)
+		with self.__busy:
+			res = self.__cmd_read_regs(self.SLAVEADD,self.REG_USET,9)
+			s = self.__sample
+		if not res: return None
+		for fn in self.__listeners: fn(s)
+		return s
+	
+	def Read_Monitor_Values(self):
+		"""
+			get the present readings for UOUT, IOUT and POUT only. This is the 
+			shortest possible read and is used by the watchdog. Returns the 
+			last Sample with these values updated, None if the read failed
+		"""
+		with self.__busy:
+			res = self.__cmd_read_regs(self.SLAVEADD,self.REG_UOUT,3)
+			s = self.__sample
+		return s if res else None
+	
+	def Read_Model(self):
+		"""
+			get the model number and firmware version 
+		"""
+		res = self.__cmd_read_regs(self.SLAVEADD,self.REG_MODEL,2)
 		return res
 	
-	def Set_Power(self, onoff):
+	def Sync_State(self):
 		"""
-			turn output on (1) or off (0)
+			re-reads all cached values including ONOFF with one batched read 
+			of 10 registers. Called automatically after a reconnect
 		"""
-		res = self.__cmd_write_reg(self.SLAVEADD,self.REG_ONOFF,onoff)
+		res = self.__cmd_read_regs(self.SLAVEADD,self.REG_USET,10)
 		return res
+	
+	def Connect(self):
+		"""
+			opens the connection now instead of on the first command. Raises
+			serial.SerialException if the port can't be opened 
+		"""
+		self.__DPS.open()
 		
-	def Set_USET(self, volts):
+	def Get_Retry_Delay(self):
+		"""
+			returns the seconds until the connection tries to reopen the 
+			lost port, 0 if it isn't lost. Messages fail right away until then
+		"""
+		return self.__DPS.retry_delay()
+		
+	def Get_Outages(self):
+		"""
+			returns a list with the duration (seconds) of each connection 
+			outage so far
+		"""
+		return self.__DPS.get_outages()
+	
+	def Add_Listener(self, fn):
+		"""
+			registers a function fn(sample) that gets called with the Sample
+			of every successful Read_Output_Values. sample.t is the clock() 
+			time of the reading (perf_counter() unless it was replaced)
+		"""
+		self.__listeners.append(fn)
+	
+	def Remove_Listener(self, fn):
+		"""
+			removes a function registered with Add_Listener
+		"""
+		if fn in self.__listeners: self.__listeners.remove(fn)
+	
+	def Set_Power(self, onoff, force=False):
+		"""
+			turn output on (1) or off (0). Turning the output off is always
+			sent, the other setters skip a write of the value the module 
+			already has unless force is True (see Set_Cache)
+		"""
+		res = self.__set_reg(self.REG_ONOFF,onoff,force or onoff == 0)
+		return res
+		
+	def Set_USET(self, volts, force=False):
 		"""
 			set a new output voltage
 		"""
-		res = self.__cmd_write_reg(self.SLAVEADD,self.REG_USET,round(volts*100))
+		res = self.__set_reg(self.REG_USET,round(volts*100),force)
 		return res
 		
-	def Set_ISET(self, amps):
+	def Set_ISET(self, amps, force=False):
 		"""
 			set a new output current
 		"""
-		res = self.__cmd_write_reg(self.SLAVEADD,self.REG_ISET,round(amps*1000))
+		res = self.__set_reg(self.REG_ISET,round(amps*1000),force)
 		return res
 		
-	def Set_OVP(self, volts):
+	def Set_OVP(self, volts, force=False):
 		"""
 			set a new over-voltage protection value
 		"""
-		res = self.__cmd_write_reg(self.SLAVEADD,self.REG_M_SOVP,round(volts*100))
+		res = self.__set_reg(self.REG_M_SOVP,round(volts*100),force)
 		return res
 	
-	def Set_OCP(self, amps):
+	def Set_OCP(self, amps, force=False):
 		"""
 			set a new over-current protection value
 		"""
-		res = self.__cmd_write_reg(self.SLAVEADD,self.REG_M_SOCP,round(amps*1000))
+		res = self.__set_reg(self.REG_M_SOCP,round(amps*1000),force)
 		return res
 		
-	def Set_OPP(self, watts):
+	def Set_OPP(self, watts, force=False):
 		"""
 			set a new over-power protection value
 		"""
-		res = self.__cmd_write_reg(self.SLAVEADD,self.REG_M_SOPP,round(watts*100))
+		res = self.__set_reg(self.REG_M_SOPP,round(watts*100),force)
 		return res
 		
 
 
-	def __init__(self,DPSport,DPSspeed):
-		self.__DPS = serial.Serial(port = DPSport,
-						baudrate=DPSspeed,
-						timeout = 0.01)	
+	def __init__(self,DPSport,DPSspeed,connection=None):
+		"""
+			connection: something with the interface of DPS_Connection to 
+						use instead of the serial port, for example the 
+						modelled module of a dry run (DPS_Sim)
+		"""
+		self.__listeners = []
+		self.__presets = {}
+		self.__confirmed = {}
+		self.__dirty = set()
+		self.__elided = {}
+		self.__busy = threading.RLock()
+		self.__msg = bytearray(8)
+		self.__buf = bytearray(64)
+		self.__bufview = memoryview(self.__buf)
+		self.clock = perf_counter
+		if connection == None:
+			connection = DPS_Connection(DPSport,DPSspeed,timeout = 0.01)
+		self.__DPS = connection
+		self.__DPS.on_reconnect = self.__reconnected	
 
 
 
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+#MIT License
+#
+#Copyright (c) 2019 TheHWcave
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+#
+
+from array import array
+
+class _Extremes:
+	"""
+		candidates for the minimum (or maximum) of a column over any window
+		that ends at the newest entry: the entry numbers whose value is 
+		lower (higher) than that of every newer entry, oldest first. Adding
+		an entry drops the candidates it beats, so it costs amortized O(1),
+		and the minimum of a window is its oldest candidate, found with a
+		binary search like the window itself. The candidates are kept in a
+		preallocated ring, the values stay in the column of the buffer
+	"""
+	__vals	= None	# the column of the buffer
+	__size	= 0		# capacity of the buffer
+	__sign	= 1		# 1 = minimum, -1 = maximum
+	__seq	= None	# ring of candidate entry numbers (counted from the first add)
+	__front	= 0		# ring slot of the oldest candidate
+	__n		= 0		# number of candidates
+
+	def __init__(self,values,size,sign):
+		self.__vals  = values
+		self.__size  = size
+		self.__sign  = sign
+		self.__seq   = array('q',bytes(8*size))
+		self.__front = 0
+		self.__n     = 0
+
+	def add(self,seq):
+		"""
+			the entry number seq was just written into the column
+		"""
+		q = self.__seq
+		size = self.__size
+		vals = self.__vals
+		# candidates that are no longer in the buffer
+		while self.__n > 0 and q[self.__front] <= seq - size:
+			self.__front = (self.__front + 1) % size
+			self.__n = self.__n - 1
+		v = self.__sign * vals[seq % size]
+		while self.__n > 0 and self.__sign * vals[q[(self.__front + self.__n - 1) % size] % size] >= v:
+			self.__n = self.__n - 1
+		q[(self.__front + self.__n) % size] = seq
+		self.__n = self.__n + 1
+
+	def get(self,first):
+		"""
+			returns the extreme value of the entries from number first to the
+			newest one
+		"""
+		q = self.__seq
+		size = self.__size
+		lo, hi = 0, self.__n - 1
+		while lo < hi:
+			mid = (lo + hi) // 2
+			if q[(self.__front + mid) % size] < first: lo = mid + 1
+			else: hi = mid
+		return self.__vals[q[(self.__front + lo) % size] % size]
+
+class DPS_History:
+	"""
+		Keeps the most recent readings from the DPS module in a fixed size
+		ring buffer. All columns are preallocated arrays of doubles, so adding
+		a sample only overwrites a few slots and never allocates anything.
+
+		Next to the raw values the buffer keeps running sums for the
+		UOUT, IOUT and POUT channels. A window mean or slope is then just the
+		difference of two running sums, no matter how long the window is.
+		The running sums are rebased every time the buffer wraps around so
+		they can't grow without limit during a long run. For the same 
+		channels the candidates for the minimum and maximum of a window are
+		kept up to date (see _Extremes).
+	"""
+
+					# column numbers. The channel columns use the same
+					# letters as the script language: V, C and P
+	TIME = 0
+	UOUT = 1
+	IOUT = 2
+	POUT = 3
+	UIN  = 4
+	USET = 5
+	ISET = 6
+	PROT = 7
+	CVCC = 8
+	NCOL = 9
+
+	KINDS = {'V':UOUT, 'C':IOUT, 'P':POUT}
+
+					# running sum numbers: sum of t, sum of t*t and for
+					# each channel sum of v and sum of t*v
+	__RT  = 0
+	__RTT = 1
+	__RV  = {UOUT:2, IOUT:3, POUT:4}
+	__RTV = {UOUT:5, IOUT:6, POUT:7}
+	__NRUN= 8
+
+	__size	= 0		# capacity of the buffer
+	__count	= 0		# number of valid entries (<= size)
+	__head	= 0		# slot that gets written next
+	__cols	= []	# one array per column
+	__runs	= []	# one array per running sum
+	__off	= None	# running sums of the entries already overwritten
+	__tbase = 0.0	# time base used for the running sums
+	__total	= 0		# number of entries added so far
+	__ext	= {}	# channel column -> (_Extremes minimum, _Extremes maximum)
+
+	def __init__(self,size=2000):
+		self.__size  = size
+		self.__count = 0
+		self.__head  = 0
+		self.__cols  = [array('d',bytes(8*size)) for n in range(self.NCOL)]
+		self.__runs  = [array('d',bytes(8*size)) for n in range(self.__NRUN)]
+		self.__off   = array('d',bytes(8*self.__NRUN))
+		self.__tbase = 0.0
+		self.__total = 0
+		self.__ext   = {col:(_Extremes(self.__cols[col],size,1),_Extremes(self.__cols[col],size,-1)) 
+						for col in self.__RV}
+
+	def __len__(self): return self.__count
+
+	def __slot(self,n):
+		"""
+			returns the buffer slot for the n-th oldest entry
+		"""
+		return (self.__head - self.__count + n) % self.__size
+
+	def __rebase(self):
+		"""
+			recalculates the running sums relative to the oldest entry
+			in the buffer. This is called once per buffer wrap, so it costs
+			O(1) per sample in total.
+		"""
+		t = self.__cols[self.TIME]
+		r = self.__runs
+		self.__tbase = t[self.__slot(0)]
+		acc = [0.0] * self.__NRUN
+		for n in range(self.__count):
+			i  = self.__slot(n)
+			dt = t[i] - self.__tbase
+			acc[self.__RT]  = acc[self.__RT]  + dt
+			acc[self.__RTT] = acc[self.__RTT] + dt*dt
+			for col,k in self.__RV.items():
+				v = self.__cols[col][i]
+				acc[k] = acc[k] + v
+				acc[self.__RTV[col]] = acc[self.__RTV[col]] + dt*v
+			for k in range(self.__NRUN):
+				r[k][i] = acc[k]
+		for k in range(self.__NRUN):
+			self.__off[k] = 0.0
+
+	def add(self,t,uout,iout,pout,uin,uset,iset,prot,cvcc):
+		"""
+			adds a new set of readings taken at time t (seconds)
+		"""
+		i = self.__head
+		p = (i - 1) % self.__size
+		c = self.__cols
+		r = self.__runs
+		if self.__count == self.__size:
+			# the oldest entry is about to be overwritten, remember its
+			# running sums so windows starting at the new oldest entry
+			# still add up
+			for k in range(self.__NRUN):
+				self.__off[k] = r[k][i]
+		c[self.TIME][i] = t
+		c[self.UOUT][i] = uout
+		c[self.IOUT][i] = iout
+		c[self.POUT][i] = pout
+		c[self.UIN][i]  = uin
+		c[self.USET][i] = uset
+		c[self.ISET][i] = iset
+		c[self.PROT][i] = prot
+		c[self.CVCC][i] = cvcc
+		if self.__count == 0:
+			self.__tbase = t
+			p = i
+			for k in range(self.__NRUN):
+				r[k][i] = 0.0
+		dt = t - self.__tbase
+		r[self.__RT][i]  = r[self.__RT][p]  + dt
+		r[self.__RTT][i] = r[self.__RTT][p] + dt*dt
+		for col,k in self.__RV.items():
+			v = c[col][i]
+			r[k][i] = r[k][p] + v
+			k = self.__RTV[col]
+			r[k][i] = r[k][p] + dt*v
+		for (lo,hi) in self.__ext.values():
+			lo.add(self.__total)
+			hi.add(self.__total)
+		self.__total = self.__total + 1
+		self.__head = (i + 1) % self.__size
+		if self.__count < self.__size:
+			self.__count = self.__count + 1
+		if self.__head == 0:
+			self.__rebase()
+
+	def add_from(self,s):
+		"""
+			adds a reading of the DPS handler (a Sample). This function can
+			be registered directly as a listener with DH.Add_Listener
+		"""
+		self.add(s.t,s.uout,s.iout,s.pout,s.uin,s.uset,s.iset,s.prot,s.cvcc)
+
+	def latest(self,col=UOUT):
+		"""
+			returns the newest value of a column (or 0.0 if empty)
+		"""
+		if self.__count == 0: return 0.0
+		return self.__cols[col][(self.__head - 1) % self.__size]
+
+	def span(self,seconds=None):
+		"""
+			returns the time covered by the buffer in seconds. With seconds
+			only the window of the last seconds counts, including the entry 
+			that was current at its start (see __window), so the result 
+			reaches seconds as soon as the window is fully covered 
+		"""
+		if self.__count == 0: return 0.0
+		t = self.__cols[self.TIME]
+		if seconds == None: first = 0
+		else:				first = self.__window(seconds,True)[0]
+		return t[(self.__head - 1) % self.__size] - t[self.__slot(first)]
+
+	def __window(self,seconds,current=False):
+		"""
+			returns (first, last) entry numbers (oldest = 0) for all entries
+			that are no older than seconds before the newest one. The time
+			column is sorted, so a binary search finds the start. With 
+			current the window also includes the entry before, which was 
+			the current reading when the window started
+		"""
+		t = self.__cols[self.TIME]
+		last = self.__count - 1
+		tmin = t[self.__slot(last)] - seconds
+		lo, hi = 0, last
+		while lo < hi:
+			mid = (lo + hi) // 2
+			if t[self.__slot(mid)] < tmin: lo = mid + 1
+			else: hi = mid
+		if current and lo > 0 and t[self.__slot(lo)] > tmin: lo = lo - 1
+		return (lo,last)
+
+	def __diff(self,k,first,last):
+		"""
+			sum of the entries first..last taken from running sum k
+		"""
+		run = self.__runs[k]
+		s = run[self.__slot(last)]
+		if first > 0: s = s - run[self.__slot(first-1)]
+		else: s = s - self.__off[k]
+		return s
+
+	def mean(self,col,seconds):
+		"""
+			mean value of a channel over the last seconds in O(1)
+		"""
+		if self.__count == 0: return 0.0
+		first,last = self.__window(seconds)
+		return self.__diff(self.__RV[col],first,last) / (last - first + 1)
+
+	def slope(self,col,seconds):
+		"""
+			least squares slope (units per second) of a channel over the
+			last seconds, also O(1) from the running sums. At least the
+			two newest entries are always used
+		"""
+		if self.__count < 2: return 0.0
+		first,last = self.__window(seconds)
+		first = min(first,last-1)
+		n   = last - first + 1
+		st  = self.__diff(self.__RT,first,last)
+		stt = self.__diff(self.__RTT,first,last)
+		sv  = self.__diff(self.__RV[col],first,last)
+		stv = self.__diff(self.__RTV[col],first,last)
+		d = n*stt - st*st
+		if d <= 0.0: return 0.0
+		return (n*stv - st*sv) / d
+
+	def minmax(self,col,seconds,current=False):
+		"""
+			returns (min,max) of a channel over the last seconds (current: 
+			see __window), O(1) apart from finding the window
+		"""
+		if self.__count == 0: return (0.0,0.0)
+		first,last = self.__window(seconds,current)
+		first = self.__total - self.__count + first
+		(lo,hi) = self.__ext[col]
+		return (lo.get(first),hi.get(first))
+
+	def dump(self,fname,t0=0.0):
+		"""
+			writes the complete buffer, oldest entry first, into a .CSV file.
+			The times are written relative to t0
+		"""
+		c = self.__cols
+		with open(fname,'w') as f:
+			f.write('Time[s],USET[V],ISET[A],UOUT[V],IOUT[A],POUT[W],UIN[V],PROT,CVCC\n')
+			for n in range(self.__count):
+				i = self.__slot(n)
+				f.write('{:5.3f},{:04.2f},{:04.3f},{:04.2f},{:04.3f},{:05.2f},{:04.2f},{:2d},{:2d}\n'.format(
+						c[self.TIME][i]-t0,
+						c[self.USET][i],
+						c[self.ISET][i],
+						c[self.UOUT][i],
+						c[self.IOUT][i],
+						c[self.POUT][i],
+						c[self.UIN][i],
+						int(c[self.PROT][i]),
+						int(c[self.CVCC][i])))
+		return self.__count
@@ -0,0 +1,1257 @@
+#!/usr/bin/env python3
+#MIT License
+#
+#Copyright (c) 2019 TheHWcave
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+#
+
+import os, json, hashlib
+from time import sleep,localtime,strftime,perf_counter
+from string import Template
+from array import array
+from DPS_History import DPS_History
+from DPS_Stats import DPS_Stats, Timing
+from DPS_Watchdog import DPS_Watchdog
+from DPS_Expr import ExprError, bind
+from DPS_Parser import DPS_Parser, Table, re_ifwin, re_ifddt, re_ifstab, re_ifstat
+
+def system(cmd,outfile):
+	"""
+		runs the command of a CALL instruction. outfile is the result file
+		($F) the command is expected to write, or ''
+	"""
+	return os.system(cmd)
+
+class Vars(dict):
+	"""
+		the variables of the script (shared by all threads). Names that 
+		aren't variables are looked up in readings, variables that didn't 
+		get a value yet are 0
+	"""
+	readings = {}	# name: function returning the value
+	
+	def __missing__(self,name):
+		if name in self.readings: return self.readings[name]()
+		return 0.0
+		
+class Task:
+	"""
+		one thread of control of the script. Each thread has its own 
+		program counter, IF condition and WAIT timer. The main loop runs one
+		operation of every thread per iteration (cooperative scheduling), 
+		all of them using the same reading of the module
+		
+		block  : PARALLEL block the thread is a branch of (pc of the 
+				 PARALLEL instruction) or None
+		parent : thread that started the PARALLEL block 
+		waiting: number of branches still running, by PARALLEL block
+		stack  : return positions of CALLSUB
+		loops  : (end value, step) of the running FOR loops, by FOR pc
+	"""
+	__slots__ = ('id','pc','condition','wtime','block','parent','waiting','stack','loops')
+	
+	def __init__(self,id,pc,block=None,parent=None):
+		self.id		 = id
+		self.pc		 = pc
+		self.condition = None
+		self.wtime	 = 0
+		self.block	 = block
+		self.parent	 = parent
+		self.waiting = {}
+		self.stack	 = []
+		self.loops	 = {}
+		
+
+class DPS_Interpreter:
+	"""
+		Interpreter for the DPS control language. load() compiles a program
+		file, run() executes it. The handler (DPS_Handler) talks to the 
+		module and the recorder (DPS_Recorder) writes the recordings, both 
+		are set up by the caller, so the interpreter can be used from other
+		programs and run many scripts one after the other:
+		
+			I = DPS_Interpreter(DH,Rec,debug=0)
+			if I.load('test.txt'): res = I.run()
+			
+		The time comes from clock() and all waiting is done with sleep(),
+		CALL commands are run by system() and LIMIT starts watchdog(). All 
+		of them can be replaced, for example by a simulation with its own 
+		clock (see DPS_Sim)
+	"""
+	
+	DH			= None		# DPS_Handler
+	Rec			= None		# DPS_Recorder
+	Hist		= None		# DPS_History, the most recent readings
+	Stats		= None		# DPS_Stats, statistics of the readings
+	Timing		= None		# Timing, interval and round trip time of the readings
+	WD			= None		# watchdog, started by the first LIMIT instruction
+	checkpoint	= 0.0		# seconds between saving the program state (0 = never)
+	cache		= True		# use the parse cache of DPS_Parser
+	clock		= None		# returns the time in seconds
+	sleep		= None		# waits a number of seconds
+	system		= None		# runs a CALL command: system(command, result file)
+	watchdog	= None		# creates the watchdog: watchdog(handler)
+	poller		= None		# DPS_Poller that decides when to read, None = read in every loop
+	dryrun		= False		# don't write the PLAY_ and PRE_ files or read CALL results (set by DPS_Sim)
+	STALE_STEPS	= 10		# operations per thread on the same reading with adaptive polling
+	LIMIT_FIELDS= {'V':'OVP', 'C':'OCP', 'P':'OPP'}	# registers LIMIT values are checked against
+	
+	__path		= ''		# name of the program file
+	__debug_prog  = True	# trace every operation
+	__debug_parser= False	# list the compiled program
+	__prog		= []		# the "compiled" program code (command, parameter1, parameter2, parameter3)
+	__condition	= None		# set by IF instruction: contains [kind , cond, value ] 
+	__wtime		= 0
+	__tasks		= []		# threads of control, see Task
+	__task		= None		# the thread running right now
+	__taskcnt	= 0			# number of threads started so far
+	__callcnt	= 0			# counts the number of calls
+	__sweeps	= {}		# sweep points already calculated, by (kind, spec or table path)
+	__tables	= {}		# PLAY tables already loaded, by table path
+	__variables	= None		# variables of the script
+	__readings	= {}		# values that can be used in expressions like variables
+	__start		= 0.0		# clock() at the start of the run
+	__stale		= 0			# operations since the last reading (adaptive polling)
+	
+	def __init__(self,handler,recorder,debug=1,history=2000,checkpoint=0.0,cache=True):
+		"""
+			handler	  : DPS_Handler for the module
+			recorder  : DPS_Recorder, set up for the recording options
+			debug	  : 0 = quiet, 1 = trace every operation, 2 = also list 
+						the compiled program
+			history	  : number of readings kept for the windowed IF conditions
+			checkpoint: seconds between saving the program state, 0 = never 
+			cache	  : use the parse cache (see DPS_Parser)
+		"""
+		self.DH		= handler
+		self.Rec	= recorder
+		self.Hist	= DPS_History(history)
+		self.Stats	= DPS_Stats()
+		self.Timing	= Timing()
+		self.WD		= None
+		self.checkpoint = checkpoint
+		self.cache	= cache
+		self.clock	= perf_counter
+		self.sleep	= sleep
+		self.system	= system
+		self.watchdog = DPS_Watchdog
+		self.__debug_prog	= (debug >= 1)
+		self.__debug_parser = (debug >= 2)
+		self.__sweeps	= {}
+		self.__tables	= {}
+		self.__readings	= {'UOUT':handler.Get_UOUT, 'IOUT':handler.Get_IOUT, 'POUT':handler.Get_POUT,
+						   'UIN':handler.Get_UIN, 'USET':handler.Get_USET, 'ISET':handler.Get_ISET,
+						   'T':lambda: self.clock() - self.__start}
+		
+	def check_IFx(self,condition):
+		"""
+			checks if the condition is met and returns true if that is the case. 
+			The instantaneous conditions use the values of the last reading, 
+			the windowed ones (averages, slopes, stability) are taken from the
+			history of readings so no extra reads are needed
+	
+		"""
+	
+		def check(val, cond, tgt):
+			if   cond == '<' : return val <  tgt
+			elif cond == '<=': return val <= tgt
+			elif cond == '==': return val == tgt
+			elif cond == '>=': return val >= tgt
+			elif cond == '>' : return val >  tgt
+			else: return True
+		
+		go = True
+		if condition != None:
+			kind = condition[0]
+			if kind[0] == 'NOW':
+				s = self.DH.Get_Sample()
+				if   kind[1] == 'C': go = check(s.iout, condition[1],condition[2])
+				elif kind[1] == 'P': go = check(s.pout, condition[1],condition[2])
+				elif kind[1] == 'V': go = check(s.uout, condition[1],condition[2])
+			else:
+				col = DPS_History.KINDS.get(kind[1])
+				if   kind[0] == 'AVG': go = check(self.Hist.mean(col,kind[2]), condition[1],condition[2])
+				elif kind[0] == 'MIN': go = check(self.Hist.minmax(col,kind[2])[0], condition[1],condition[2])
+				elif kind[0] == 'MAX': go = check(self.Hist.minmax(col,kind[2])[1], condition[1],condition[2])
+				elif kind[0] == 'DDT': go = check(self.Hist.slope(col,kind[2]), condition[1],condition[2])
+				elif kind[0] == 'STAT': go = check(self.Stats.value(kind[1],kind[2]), condition[1],condition[2])
+				elif kind[0] == 'STABLE':
+					# stable means the readings stayed within the tolerance band
+					# for at least the full time window, counting the reading that
+					# was current when the window started
+					lo,hi = self.Hist.minmax(col,kind[3],True)
+					go = (hi - lo <= kind[2]) and (self.Hist.span(kind[3]) >= kind[3])
+		return go
+	
+	def if_kind(self,kind):
+		"""
+			translates the kind of an IF instruction into a tuple:
+				C, P, V				-> ('NOW',kind)
+				C_avg(2s)			-> ('AVG','C',2.0)  also _min and _max
+				dV/dt or dV/dt(2s)	-> ('DDT','V',2.0)  default window 1s
+				stable(V,0.01,3s)	-> ('STABLE','V',0.01,3.0)
+				C_mean				-> ('STAT','C','MEAN')  also _std and _ewma
+				E or Q				-> ('STAT','','E')  energy (Wh) or charge (Ah)
+		"""
+		k = kind.upper()
+		m = re_ifstat.match(k)
+		if m: 
+			if m.group(1): return ('STAT',m.group(1),m.group(2))
+			else: return ('STAT','',m.group(3))
+		m = re_ifwin.match(k)
+		if m: return (m.group(2),m.group(1),float(m.group(3)))
+		m = re_ifddt.match(k)
+		if m: 
+			if m.group(3): return ('DDT',m.group(1),float(m.group(3)))
+			else: return ('DDT',m.group(1),1.0)
+		m = re_ifstab.match(k)
+		if m: return ('STABLE',m.group(1),float(m.group(2)),float(m.group(3)))
+		return ('NOW',k)
+
+	def list_op(self,lc,ins,p1="",p2="",p3="",note=""):
+		"""
+			prints a formatted line of the performed operation. Lines of 
+			threads other than the main one show the thread number too
+		"""
+		if self.__debug_prog: 
+			p = p1+' '+p2+' '+p3
+			if self.__task != None and self.__task.id > 0: 
+				print('{:02d}/{:d}: {:6s} {:10s} {:4s}'.format(lc,self.__task.id,ins,p,note))
+			else:
+				print('{:02d}: {:6s} {:10s} {:4s}'.format(lc,ins,p,note))
+		return None
+
+
+	def new_task(self,pc,block=None,parent=None):
+		"""
+			starts a new thread of control at pc. It runs from the next 
+			iteration of the main loop on
+		"""
+		t = Task(self.__taskcnt,pc,block,parent)
+		self.__taskcnt = self.__taskcnt + 1
+		self.__tasks.append(t)
+		return t
+	
+	####################################################################
+	# Program operations. The compiled code consists of calls to these
+	# functions, all called op_xxxx with xxxx being the opcode of the 
+	# program. 
+	#
+	# Each operation has to advance the program counter (PC) when 
+	# it is complete. The op_goto operation changes the PC to the PC
+	# for the new target. 
+	# 
+	# Most operations complete in one call except for the op_wait 
+	# function which may take many calls until the time or the condition
+	# is satisfied
+	# 
+	# The iterations are about one every 500 ms. This is mainly because 
+	# of the slow serial interface and message exchange 
+	#
+
+	def op_call(self,pc,lc,cmd,par1,par2,rtime):
+		"""
+			executes a command (only works if recording is on), see do_call.
+			The command runs to completion, other threads wait for it
+		"""
+		self.do_call(lc,cmd,par1,par2,rtime)
+		return pc+1
+
+	def do_call(self,lc,cmd,par1,par2,rtime):
+		"""
+			executes a command (only works if recording is on)
+		
+			par1 or par2 can include the following meta strings
+		
+			$D  = expand to date/time string
+			$N  = expand to call number 
+			$F  = expands to a unique text file name which is read after the call and insert data into recording
+			$$  = $
+		
+			Only par1 is used for the actuall command. Par2 is passed (as comment) into the recording file
+		"""
+	
+	
+	
+		self.__callcnt = self.__callcnt+1
+		callres = ''
+		ns = '{:04d}'.format(self.__callcnt)
+		rfn = self.Rec.get_recname()
+		if rfn != '':
+			ofn = '_'+rfn+'.tmp'
+			ds = strftime('%Y%m%d%H%M%S',localtime())
+		
+			c  = Template(cmd).safe_substitute(D=ds,d=ds, N= ns,n=ns, F=ofn,f=ofn, R=rfn,r=rfn)
+		
+			p1 = Template(par1).safe_substitute(D=ds,d=ds, N= ns,n=ns, F=ofn,f=ofn, R=rfn,r=rfn)
+		
+			p2 = Template(par2).safe_substitute(D=ds,d=ds, N= ns,n=ns, F=ofn,f=ofn, R=rfn,r=rfn)
+		
+		
+	
+			# res = os.popen(par).read() # output in res
+		
+			if (ofn in c) or (ofn in p1) :
+				self.system(c+p1,ofn)
+				if not self.dryrun:
+					# a dry run doesn't run the command, there is no result
+					try:
+						with open(ofn,'r') as tfi:
+							callres = tfi.readline().strip()
+					except:
+						print('error reading ', ofn)
+					try:
+						os.remove(ofn)
+					except: pass
+				self.list_op(lc,'call',c+p1,note='call no:'+ns+' res='+callres+' '+p2)
+			else:
+				self.system(c+p1,'')
+				self.list_op(lc,'call',c+p1,note='call no:'+ns+' '+p2)
+			self.Rec.set_callcnt(self.__callcnt)
+			self.Rec.do_record(rtime,callres=callres,callcmt=p2)
+			# statistics of everything since the previous call
+			self.list_op(lc,'stats',note=self.Stats.text(True))
+			self.Rec.record_summary(rtime,self.Stats.mark())
+		else:
+			self.list_op(lc,'call',cmd+par1+par2,note="skipped (no recording)")
+		return None
+	
+	def op_output(self,pc,lc,onoff,dummy,dummy2,rtime):
+		"""
+			turns the output on or off  
+			onoff:  'ON' or 'OFF' 
+		"""
+		self.list_op(lc,'power',onoff)
+		if onoff.upper() == 'ON':
+			res = self.DH.Set_Power(1)
+		else:
+			res = self.DH.Set_Power(0)
+		self.Rec.do_record(rtime)
+		return pc+1
+
+	def op_record(self,pc,lc,level,freq,dummy2,rtime):
+		"""
+			select recording level  
+			level:  0 = off,  1 = record commands only, 2 = record regular, 3 = record both, 4 = calls only
+			freq:  for level 2 or 3, time in seconds between regular recording
+		"""
+		self.list_op(lc,'record',level,freq)
+		self.Rec.set_recording(int(level),float(freq))
+		return pc+1
+	
+	def checked(self,field,value):
+		"""
+			returns value if it fits the register of field (USET, ISET, OVP,
+			OCP or OPP, see DPS_Handler.In_Range), raises ExprError if not
+		"""
+		if not self.DH.In_Range(field,value): 
+			raise ExprError('{:s} {:g} out of range'.format(field,value))
+		return value
+
+	def op_inc(self,pc,lc,kind, delta,dummy2,rtime):
+		"""
+			increases/decreases output voltage / current by delta
+			kind: 'V' = voltage or 'C' = current
+			delta:  voltage / current to be added or subtracted 
+
+		"""
+		kind = kind.upper()
+		if kind == 'V': 
+			last = self.DH.Get_USET()
+			last = last + float(delta)
+			if last < 0.0: last = 0.0
+			self.DH.Set_USET(self.checked('USET',last))
+		elif kind == 'C': 
+			last = self.DH.Get_ISET()
+			last = last + float(delta)
+			if last < 0.0: last = 0.0
+			self.DH.Set_ISET(self.checked('ISET',last))
+		
+		self.list_op(lc,'inc',kind,delta,note='new: '+str(last))
+
+		self.Rec.do_record(rtime)
+	
+		return pc+1
+	
+	def op_set(self,pc,lc,kind, newvalue,dummy2, rtime):
+		"""
+			set output voltage / current
+			kind: 'V' = voltage or 'C' = current
+			newvalue:  new target voltage / current
+
+		"""
+		kind = kind.upper()
+		self.list_op(lc,'set',kind,newvalue)
+	
+		if   kind == 'V': res = self.DH.Set_USET(self.checked('USET',float(newvalue)))
+		elif kind == 'C': res = self.DH.Set_ISET(self.checked('ISET',float(newvalue)))
+	
+		self.Rec.do_record(rtime)
+		return pc+1
+	
+	def op_max(self,pc,lc,kind, maxval,dummy2,rtime):
+		"""
+			set over-[kind] protection 
+			kind:   'V' (volts) , 'C' (current), 'P' (power) 
+			maxval:  new limit
+
+		"""
+		kind = kind.upper()
+		self.list_op(lc,'max',kind,maxval)
+		
+		if 		kind == 'C': res = self.DH.Set_OCP(self.checked('OCP',float(maxval)))
+		elif 	kind == 'P': res = self.DH.Set_OPP(self.checked('OPP',float(maxval)))
+		elif 	kind == 'V': res = self.DH.Set_OVP(self.checked('OVP',float(maxval)))
+	
+		self.Rec.do_record(rtime)
+		return pc+1
+
+	def op_preset(self,pc,lc,group,values,dummy2,rtime):
+		"""
+			programs a preset group with one message. The group is read from
+			the module the first time and the write is skipped if nothing 
+			changes
+			group : 0 .. 9
+			values: (uset, iset, ovp, ocp, opp), None keeps the present value
+		"""
+		group = int(group)
+		values = [None if v == None else self.checked(f,float(v)) for (f,v) in zip(self.DH.PRESET_FIELDS,values)]
+		while values[-1] == None: values.pop()	# no need to write those
+		if self.DH.Get_Preset(group) == None: self.DH.Read_Preset(group)
+		diff = self.DH.Diff_Preset(group,values)
+		if len(diff) == 0:
+			self.list_op(lc,'preset',str(group),note='unchanged')
+		else:
+			res = self.DH.Write_Preset(group,values)
+			self.list_op(lc,'preset',str(group),note=' '.join('{:s} {:g}'.format(f,new) for (f,old,new) in diff))
+		return pc+1
+	
+	def op_recall(self,pc,lc,group,dummy,dummy2,rtime):
+		"""
+			makes a preset group the active settings (USET, ISET, OVP, OCP, 
+			OPP) with a single write
+			group : 1 .. 9
+		"""
+		p = self.DH.Get_Preset(int(group))
+		if p != None: note = '{:.2f}V {:.3f}A'.format(p[0],p[1])
+		else:		  note = ''
+		self.list_op(lc,'recall',group,note=note)
+		res = self.DH.Recall_Preset(int(group))
+		self.Rec.do_record(rtime)
+		return pc+1
+
+
+
+
+	
+	def op_sweep(self,pc,lc,kind,spec,cmd,rtime):
+		"""
+			steps the output voltage, current or both through a list of points
+			in a single instruction. The points come from a range or from a 
+			table file (see sweep_points). 
+			kind : 'V', 'C' or 'VC' (voltage outer loop, current inner loop)
+			spec : from:to:step:dwell, for VC two of them separated by a comma,
+				   or @file for a table 
+			cmd	 : (optional) command executed at every point, same as CALL
+		
+			All points are done in a tight loop here instead of one point per
+			program iteration. The setpoint writes follow a fixed schedule (each
+			point starts dwell seconds after the previous one) and the module is 
+			read continuously in between, so recording, history and statistics
+			keep working. The sweep stops early if the module reports a 
+			protection, the main loop takes care of that. 
+		"""
+		kind = kind.upper()
+		points = self.sweep_points(kind,spec)
+		self.list_op(lc,'sweep',kind,spec,note=str(sum(1 for p in points if p[3]))+' points')
+		deadline = self.clock()
+		n = 0
+		for (u,i,dwell,measure) in points:
+			if u != None: self.DH.Set_USET(u)
+			if i != None: self.DH.Set_ISET(i)
+			deadline = deadline + dwell
+			while True:
+				res = self.DH.Read_Output_Values()
+				now = self.clock()
+				if res:
+					if self.tripped(): return pc+1
+					self.Rec.do_record(now - self.__start,True)
+				if now >= deadline: break
+			if measure:
+				n = n + 1
+				rt = now - self.__start
+				self.list_op(lc,'sweep',kind,'{:.3f}V {:.3f}A'.format(self.DH.Get_USET(),self.DH.Get_ISET()),
+						note='point '+str(n))
+				self.Rec.do_record(rt)
+				if cmd != '': 
+					self.do_call(lc,cmd,'','',rt)
+					# the next point starts after the call has finished
+					deadline = max(deadline,self.clock())
+		return pc+1
+
+
+	def op_play(self,pc,lc,fname,dummy,dummy2,rtime):
+		"""
+			plays a waveform from a table file. Each line of the file has
+				time uset iset
+			with time in seconds from the start of the PLAY instruction. The 
+			table is loaded into arrays and the setpoints are written at their
+			time (deadline scheduling). If the link can't keep up and the next
+			point is already due, the late point is dropped and the newer one is 
+			written instead. Between points the module is read as long as there 
+			is time for it. 
+		
+			The timing error of every point is saved in PLAY_<date-time>.csv 
+			(except in a dry run) and
+			a summary with the achieved and the maximum possible update rate is
+			shown at the end
+		"""
+		(tt,tu,ti) = self.play_table(fname)
+		npts = len(tt)
+		self.list_op(lc,'play',fname,note=str(npts)+' points')
+		err  = array('d',bytes(8*npts))	# timing error per point, in seconds
+		done = bytearray(npts)				# 1 = written, 0 = dropped
+		lastu = lasti = None
+		wtime = 0.0							# total time spent writing
+		nwr  = 0							# number of write transactions
+		rdtime = 0.05						# expected duration of a read
+		t0 = self.clock()
+		n = 0
+		while n < npts:
+			# skip points that are already overdue because the next one is due too
+			now = self.clock()
+			while n+1 < npts and t0 + tt[n+1] <= now: n = n + 1
+			deadline = t0 + tt[n]
+			# use the time until the point is due for reading the module
+			while deadline - now > rdtime:
+				tr = self.clock()
+				if self.DH.Read_Output_Values():
+					if self.tripped(): 
+						n = npts
+						break
+					self.Rec.do_record(self.clock() - self.__start,True)
+				now = self.clock()
+				rdtime = 0.8*rdtime + 0.2*(now - tr)
+			if n >= npts: break
+			self.wait_until(deadline)
+			tw = self.clock()
+			err[n] = tw - deadline
+			if tu[n] != lastu:
+				self.DH.Set_USET(tu[n])
+				lastu = tu[n]
+				nwr = nwr + 1
+			if ti[n] != lasti:
+				self.DH.Set_ISET(ti[n])
+				lasti = ti[n]
+				nwr = nwr + 1
+			wtime = wtime + self.clock() - tw
+			done[n] = 1
+			self.Rec.do_record(tw - self.__start)
+			n = n + 1
+		dur = self.clock() - t0
+		played = sum(done)
+		fn = 'PLAY_'+strftime('%Y%m%d%H%M%S',localtime())+'.csv'
+		if not self.dryrun:
+			with open(fn,'w') as f:
+				f.write('Time[s],USET[V],ISET[A],Error[ms],played\n')
+				for n in range(npts):
+					f.write('{:5.3f},{:04.2f},{:04.3f},{:6.2f},{:d}\n'.format(tt[n],tu[n],ti[n],err[n]*1000,done[n]))
+		if played > 0:
+			maxerr = max(err[n] for n in range(npts) if done[n])
+			avgerr = sum(err[n] for n in range(npts) if done[n]) / played
+		else:
+			maxerr = avgerr = 0.0
+		if nwr > 0: maxrate = '{:.1f}'.format(nwr / wtime)
+		else:		maxrate = '-'
+		self.list_op(lc,'play',fname,note='{:d} played, {:d} dropped, error avg {:.1f}ms max {:.1f}ms'.format(
+				played,npts-played,avgerr*1000,maxerr*1000))
+		note = 'rate {:.1f} points/s, max {:s} writes/s'.format(played/dur if dur > 0 else 0.0,maxrate)
+		if not self.dryrun: note = note+', details in '+fn
+		self.list_op(lc,'play',fname,note=note)
+		return pc+1
+
+
+	def wait_until(self,deadline):
+		"""
+			waits until clock() reaches deadline. With the normal clock this
+			is a busy wait because sleep() is not precise enough for PLAY, 
+			a replaced clock gets the rest passed to sleep()
+		"""
+		if self.clock is perf_counter:
+			while self.clock() < deadline: pass
+		else:
+			rest = deadline - self.clock()
+			if rest > 0: self.sleep(rest)
+
+	def op_limit(self,pc,lc,kind,value,dummy2,rtime):
+		"""
+			sets a software limit that is watched by the watchdog thread. The 
+			watchdog starts with the first LIMIT instruction
+			kind : 'V' (volts), 'C' (amps), 'P' (watts), 'E' (energy in Wh) or
+				   'T' (seconds since the first LIMIT)
+			value: the limit 
+		"""
+		kind = kind.upper()
+		self.list_op(lc,'limit',kind,value)
+		# V, C and P are checked like the protection registers, E and T 
+		# only can't be negative
+		value = float(value)
+		if kind in self.LIMIT_FIELDS: self.checked(self.LIMIT_FIELDS[kind],value)
+		elif value < 0: raise ExprError('LIMIT {:s} {:g} out of range'.format(kind,value))
+		if self.WD == None:
+			self.WD = self.watchdog(self.DH)
+			self.WD.set_limit(kind,value)
+			self.WD.start()
+		else:
+			self.WD.set_limit(kind,value)
+		return pc+1
+	
+	def op_if(self,pc,lc,kind, cond, value,rtime):
+		"""
+			sets a condition (for next wait or goto command)   
+			kind : C, P or V, or a windowed form like C_avg(2s), dV/dt or 
+			       stable(V,0.01,3s) (see if_kind)
+			cond : condition (<, <=, == , >=, >), not used with stable()
+			value: target value, not used with stable()
+		"""
+		self.list_op(lc,'if',kind,cond,value)
+
+		if cond == '=': cond = '=='
+		if value == '': value = 0.0
+		self.__condition = (self.if_kind(kind),cond,float(value))
+		return pc+1
+	
+	
+	def op_wait(self,pc,lc,seconds,dummy,dummy2,rtime):
+		"""
+			waits for a number of seconds or on a previously set condition
+			seconds : wait time, or timeout if waiting for condition
+		"""
+
+			
+		res = pc
+		if (self.__condition == None):
+			# unconditional wait based on time
+			if self.__wtime == 0:
+				self.__wtime = rtime
+			if rtime - self.__wtime >= float(seconds):
+				res = pc + 1
+				self.__wtime = 0
+				self.list_op(lc,'wait',seconds,note='time reached')
+			else:
+				self.list_op(lc,'wait',seconds,note='time not reached')
+		else: # conditional wait 
+			if self.check_IFx(self.__condition):
+				res = pc+1
+				self.__condition = None
+				self.list_op(lc,'wait',seconds,note='cond: True')
+			else:
+				if float(seconds) > 0:
+					# conditional wait with timeout
+					if self.__wtime == 0:
+						self.__wtime = rtime
+					if rtime - self.__wtime >= float(seconds):
+						self.__wtime = 0
+						res = pc+1
+						self.__condition = None
+						self.list_op(lc,'wait',seconds,note='cond: <timeout>')
+					else:
+						self.list_op(lc,'wait',seconds,note='cond: False')
+				else:
+					self.list_op(lc,'wait',seconds,note='cond: False')
+		return res
+	
+	def op_goto(self,pc, lc,target,dest,dummy2,rtime):
+		"""
+			jumps to a new program position or conditionally based on the
+			previously set condition 
+			target  : label to jump to  
+			dest	: program position of the label
+		"""
+		if (self.__condition == None):
+			res = dest
+			self.list_op(lc,'goto',target,note='unconditional')
+		else:
+			if self.check_IFx(self.__condition):
+				res = dest
+				self.list_op(lc,'goto',target,note='cond:True')
+			else:
+				self.list_op(lc,'goto',target,note='cond:False, no GOTO')
+				res = pc + 1
+			self.__condition = None
+		return res
+	
+	def op_parallel(self,pc,lc,branches,endpc,dummy2,rtime):
+		"""
+			starts a PARALLEL block. Every branch after the first one gets 
+			its own thread, the first branch continues in the present thread
+			branches: program positions of the BRANCH instructions 
+			endpc	: program position of the END of the block
+		"""
+		self.list_op(lc,'par',note=str(len(branches)+1)+' branches')
+		for b in branches: self.new_task(b+1,pc,self.__task)
+		self.__task.waiting[pc] = len(branches)
+		return pc+1
+
+	def end_branch(self,parpc):
+		"""
+			ends the present thread, which is a branch of the PARALLEL block
+			at parpc, and tells the thread waiting at the END of the block
+		"""
+		self.__task.parent.waiting[parpc] = self.__task.parent.waiting[parpc] - 1
+		return len(self.__prog)
+
+	def op_branch(self,pc,lc,parpc,endpc,dummy2,rtime):
+		"""
+			separates the branches of a PARALLEL block. A thread that gets 
+			here has finished its branch: a branch thread ends, the thread that
+			started the block goes to the END and waits for the others there
+		"""
+		if self.__task.block == parpc: 
+			self.list_op(lc,'branch',note='done')
+			return self.end_branch(parpc)
+		self.list_op(lc,'branch',note='done, to END')
+		return endpc
+	
+	def op_end(self,pc,lc,parpc,endpc,dummy2,rtime):
+		"""
+			end of a PARALLEL block: waits until all branches are done. An END
+			outside of a PARALLEL block ends the present thread (the program
+			ends when all threads have ended)
+		"""
+		if parpc == None:
+			self.list_op(lc,'end',note='thread ends')
+			return len(self.__prog)
+		if self.__task.block == parpc: 
+			self.list_op(lc,'end',note='branch done')
+			return self.end_branch(parpc)
+		n = self.__task.waiting.get(parpc,0)
+		if n > 0:
+			self.list_op(lc,'end',note='waiting for '+str(n)+' branch(es)')
+			return pc
+		self.__task.waiting.pop(parpc,None)
+		self.list_op(lc,'end',note='all branches done')
+		return pc+1
+
+	def op_spawn(self,pc,lc,target,dest,dummy2,rtime):
+		"""
+			starts a new thread at a label. It runs alongside the present
+			thread until it reaches an END outside of a PARALLEL block or the 
+			end of the program
+			target  : label where the new thread starts 
+			dest	: program position of the label
+		"""
+		t = self.new_task(dest)
+		self.list_op(lc,'spawn',target,note='thread '+str(t.id))
+		return pc+1
+	
+	def op_let(self,pc,lc,name,value,dummy2,rtime):
+		"""
+			assigns a value to a variable
+			name  : variable name 
+			value : number or expression
+		"""
+		v = float(value)
+		self.__variables[name.upper()] = v
+		self.list_op(lc,'let',name,value,note='= '+str(v))
+		return pc+1
+	
+	def op_for(self,pc,lc,name,spec,nextpc,rtime):
+		"""
+			start of a loop, the matching NEXT repeats it
+			name   : loop variable
+			spec   : (from, to, step) expressions. If step is None it is 1 or
+					 -1, depending on the direction
+			nextpc : position of the matching NEXT
+		
+			The loop is skipped if from is already beyond to 
+		"""
+		(a,b,c) = spec
+		v  = float(a)
+		to = float(b)
+		if c == None: step = 1.0 if to >= v else -1.0
+		else: 		  step = float(c)
+		self.__variables[name] = v
+		self.list_op(lc,'for',name,':'.join(x for x in spec if x != None),note='= '+str(v))
+		if step == 0 or (step > 0 and v > to) or (step < 0 and v < to):
+			return nextpc+1
+		self.__task.loops[pc] = (to,step)
+		return pc+1
+
+	def op_next(self,pc,lc,name,forpc,dummy2,rtime):
+		"""
+			end of a loop: advances the loop variable and repeats the loop
+			until the end value is passed
+			forpc : position of the matching FOR
+		"""
+		if forpc not in self.__task.loops:
+			self.list_op(lc,'next',name,note='no FOR, ignored')
+			return pc+1
+		(to,step) = self.__task.loops[forpc]
+		v = self.__variables[name] + step
+		# allow for rounding errors of fractional steps
+		if (step > 0 and v <= to + step*1e-9) or (step < 0 and v >= to + step*1e-9):
+			self.__variables[name] = v
+			self.list_op(lc,'next',name,note='= '+str(v))
+			return forpc+1
+		del self.__task.loops[forpc]
+		self.list_op(lc,'next',name,note='done')
+		return pc+1
+	
+	def op_callsub(self,pc,lc,target,dest,dummy2,rtime):
+		"""
+			calls a subroutine, RETURN continues after the CALLSUB 
+			target  : label of the subroutine 
+			dest	: program position of the label
+		"""
+		self.__task.stack.append(pc+1)
+		self.list_op(lc,'callsub',target)
+		return dest
+	
+	def op_return(self,pc,lc,dummy,dummy1,dummy2,rtime):
+		"""
+			returns from a subroutine
+		"""
+		if len(self.__task.stack) == 0:
+			self.list_op(lc,'return',note='without CALLSUB, thread ends')
+			return len(self.__prog)
+		self.list_op(lc,'return')
+		return self.__task.stack.pop()
+	
+	#
+	# helper functions
+	#
+
+	def tripped(self):
+		"""
+			returns True if the module reported a protection or the watchdog
+			turned the output off
+		"""
+		return self.DH.Get_PROT() > 0 or (self.WD != None and self.WD.tripped.is_set())
+	
+	def state_name(self):
+		"""
+			name of the file that holds the program state of the script. It 
+			is kept in the working directory like the recordings, so runs of
+			the same script in different directories (DPS_Batch) don't share it
+		"""
+		return os.path.basename(self.__path)+'.state'
+	
+	def script_hash(self):
+		with open(self.__path,'rb') as f:
+			return hashlib.sha1(f.read()).hexdigest()
+	
+	def save_state(self,runtime,onoff=None):
+		"""
+			saves everything needed to continue the run later (--resume). The
+			file is written under a temporary name first and then renamed, so 
+			there is always a complete state file even if we crash while saving.
+			onoff is the output state to continue with (default: the present
+			one)
+		"""
+		if onoff == None: onoff = self.DH.Get_ONOFF()
+		state = {'script':self.__path, 'variables':self.__variables, 'hash':self.script_hash(), 'time':strftime('%Y-%m-%d %H:%M:%S',localtime()),
+				 'tasks':[{'id':t.id, 'pc':t.pc, 'condition':t.condition, 'wtime':t.wtime, 'block':t.block,
+						   'parent':t.parent.id if t.parent != None else None,
+						   'waiting':list(t.waiting.items()), 'stack':t.stack,
+						   'loops':list(t.loops.items())} for t in self.__tasks],
+				 'taskcnt':self.__taskcnt, 'callcnt':self.__callcnt, 'runtime':runtime,
+				 'uset':self.DH.Get_USET(), 'iset':self.DH.Get_ISET(), 'onoff':onoff,
+				 'ovp':self.DH.Get_OVP(), 'ocp':self.DH.Get_OCP(), 'opp':self.DH.Get_OPP(),
+				 'limits':self.WD.get_limits() if self.WD != None else {},
+				 'recorder':self.Rec.get_state()}
+		tmp = self.state_name()+'.tmp'
+		with open(tmp,'w') as f:
+			json.dump(state,f,indent=1)
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(tmp,self.state_name())
+	
+	def __checkpoint(self,runtime,onoff=None):
+		"""
+			save_state for the main loop: a state file that can't be written
+			is reported, the run goes on (or ends) as it would without it
+		"""
+		try:
+			self.save_state(runtime,onoff)
+		except OSError as err:
+			print('can\'t save the state: '+str(err))
+	
+	def load_state(self):
+		"""
+			reads the saved state, re-applies the settings to the DPS and 
+			continues the recording. Returns the run time at the checkpoint,
+			or None if the state doesn't fit the program
+		"""
+		try:
+			with open(self.state_name(),'r') as f:
+				state = json.load(f)
+		except OSError as err:
+			print('can\'t read the state: '+str(err))
+			return None
+		if state['hash'] != self.script_hash():
+			print(self.__path+' has changed since the state was saved, can\'t resume')
+			return None
+		self.__callcnt	= state['callcnt']
+		self.__variables.update(state['variables'])
+		self.__taskcnt	= state['taskcnt']
+		byid = {}
+		del self.__tasks[:]
+		for ts in state['tasks']:
+			t = Task(ts['id'],ts['pc'],ts['block'])
+			t.wtime = ts['wtime']
+			c = ts['condition']
+			if c != None: t.condition = (tuple(c[0]),c[1],c[2])
+			t.waiting = {b:n for (b,n) in ts['waiting']}
+			t.stack = ts['stack']
+			t.loops = {f:tuple(l) for (f,l) in ts['loops']}
+			byid[t.id] = t
+			self.__tasks.append(t)
+		for ts in state['tasks']:
+			if ts['parent'] != None: byid[ts['id']].parent = byid.get(ts['parent'])
+		# protection settings first, then the setpoints, the output last
+		if state['ovp'] > 0: self.DH.Set_OVP(state['ovp'])
+		if state['ocp'] > 0: self.DH.Set_OCP(state['ocp'])
+		if state['opp'] > 0: self.DH.Set_OPP(state['opp'])
+		self.DH.Set_USET(state['uset'])
+		self.DH.Set_ISET(state['iset'])
+		for (kind,value) in state['limits'].items():
+			if self.WD == None: 
+				self.WD = self.watchdog(self.DH)
+				self.WD.set_limit(kind,value)
+				self.WD.start()
+			else:
+				self.WD.set_limit(kind,value)
+		self.DH.Set_Power(state['onoff'])
+		self.Rec.resume_recording(state['recorder'])
+		print('resuming '+self.__path+' at line '+str(self.__prog[self.__tasks[0].pc][1])+' from '+state['time'])
+		return state['runtime']
+	
+	def play_table(self,fname):
+		"""
+			puts the time/uset/iset table of PLAY (a Table, read by the 
+			parser) into three arrays. The rows are sorted by time
+		"""
+		if fname.path in self.__tables: return self.__tables[fname.path]
+		rows = sorted(fname.rows)
+		res = (array('d',[r[0] for r in rows]),
+			   array('d',[r[1] for r in rows]),
+			   array('d',[r[2] for r in rows]))
+		self.__tables[fname.path] = res
+		return res
+	
+	def sweep_range(self,r):
+		"""
+			returns the list of values and the dwell time of a range 
+			from:to:step:dwell. The values are calculated from the start value
+			so there is no rounding error build up
+		"""
+		(fr,to,step,dwell) = [float(x) for x in r.split(':')]
+		if step == 0.0 or (to - fr) * step < 0.0: 
+			values = [fr]
+		else:
+			values = [fr + n*step for n in range(int(round((to - fr) / step)) + 1)]
+		return (values,dwell)
+	
+	def sweep_points(self,kind,spec):
+		"""
+			builds the list of points for a sweep. Each point is a tuple
+			(uset or None, iset or None, dwell, measure). Settling points are 
+			not measured (measure = False)
+		
+			spec @file is a table (a Table, read by the parser) with one 
+			point per row:
+				value dwell 			for V and C
+				volts amps dwell		for VC
+		"""
+		key = (kind,spec.path if isinstance(spec,Table) else spec)
+		if key in self.__sweeps: return self.__sweeps[key]
+		points = []
+		if spec.startswith('@'):
+			for col in spec.rows:
+				if   kind == 'V' : points.append((col[0],None,col[1],True))
+				elif kind == 'C' : points.append((None,col[0],col[1],True))
+				else:			   points.append((col[0],col[1],col[2],True))
+		elif kind == 'VC':
+			(vr,cr) = spec.split(',')
+			(vvals,vdwell) = self.sweep_range(vr)
+			(cvals,cdwell) = self.sweep_range(cr)
+			for v in vvals:
+				if vdwell > 0.0:
+					points.append((v,None,vdwell,False))
+					points.append((None,cvals[0],cdwell,True))
+				else:
+					points.append((v,cvals[0],cdwell,True))
+				for c in cvals[1:]:
+					points.append((None,c,cdwell,True))
+		else:
+			(vals,dwell) = self.sweep_range(spec)
+			for x in vals:
+				if kind == 'V': points.append((x,None,dwell,True))
+				else:			points.append((None,x,dwell,True))
+		self.__sweeps[key] = points
+		return points
+
+	#
+	# the function for each opcode of the compiled program (see DPS_Parser)
+	#
+	OPS = {
+			'BRANCH'   :op_branch,
+			'CALL'     :op_call,
+			'CALLSUB'  :op_callsub,
+			'END'      :op_end,
+			'FOR'      :op_for,
+			'GOTO'     :op_goto,
+			'IF'       :op_if,
+			'INC'      :op_inc,
+			'LET'      :op_let,
+			'LIMIT'    :op_limit,
+			'SET'      :op_set,
+			'SPAWN'    :op_spawn,
+			'SWEEP'    :op_sweep,
+			'MAX'      :op_max,
+			'NEXT'     :op_next,
+			'OUTPUT'   :op_output,
+			'PARALLEL' :op_parallel,
+			'PLAY'     :op_play,
+			'PRESET'   :op_preset,
+			'RECALL'   :op_recall,
+			'RECORD'   :op_record,
+			'RETURN'   :op_return,
+			'WAIT'     :op_wait
+	}
+
+	def load(self,path):
+		"""
+			reads and compiles the program file (see DPS_Parser). Returns 
+			True if the program is ready to run, or False after printing the
+			errors 
+		"""
+		P = DPS_Parser(self.cache)
+		prog = P.parse(path)
+		if prog == None:
+			P.print_errors()
+			print('program execution stopped')
+			return False
+		if self.__debug_parser: P.listing()
+		self.__path	= path
+		self.__prog = [(self.OPS[ins[0]],)+ins[1:] for ins in prog]
+		self.__variables = Vars()
+		self.__variables.readings = self.__readings
+		for ins in self.__prog: bind(ins[2:],self.__variables)
+		return True
+
+	def run(self,resume=False):
+		"""
+			runs the loaded program and returns the exit code:
+			0 = ok, 2 = stopped by a protection of the module, 3 = stopped by
+			the watchdog. With resume the program continues from the saved
+			state. Ctrl-C (KeyboardInterrupt) saves the state, turns the 
+			output off and is passed on to the caller
+		"""
+		self.__tasks	= []
+		self.__task		= None
+		self.__taskcnt	= 0
+		self.__callcnt	= 0
+		self.__condition= None
+		self.__wtime	= 0
+		self.WD			= None
+		self.DH.Add_Listener(self.Hist.add_from)
+		self.DH.Add_Listener(self.Stats.add_from)
+		self.DH.Add_Listener(self.Timing.add_from)
+		if self.poller != None: self.DH.Add_Listener(self.poller.add_from)
+		try:
+			return self.__run(resume)
+		finally:
+			self.DH.Remove_Listener(self.Hist.add_from)
+			self.DH.Remove_Listener(self.Stats.add_from)
+			self.DH.Remove_Listener(self.Timing.add_from)
+			if self.poller != None: self.DH.Remove_Listener(self.poller.add_from)
+
+	def __step(self,runtime):
+		"""
+			runs one operation of every thread, all based on the same reading.
+			The IF condition and WAIT timer of the thread are swapped in and
+			out around the operation
+		"""
+		for task in list(self.__tasks):
+			self.__task = task
+			self.__condition = task.condition
+			self.__wtime = task.wtime
+			ins = self.__prog[task.pc]
+			task.pc = ins[0](self,task.pc, ins[1],ins[2], ins[3], ins[4],runtime)
+			task.condition = self.__condition
+			task.wtime = self.__wtime
+			if task.pc >= len(self.__prog): self.__tasks.remove(task)
+			if self.tripped(): break
+		self.__task = None
+		
+	def __reading_due(self):
+		"""
+			adaptive polling: returns True if the module should be read now
+			(see DPS_Poller). Threads that are not in a WAIT may go on with 
+			the last reading for up to STALE_STEPS operations. After that, or
+			if every thread sits in a WAIT, there is nothing to do, so this 
+			sleeps until the reading is due or the time of a WAIT runs out, 
+			whatever comes first
+		"""
+		wake = self.poller.due()
+		busy = False
+		for task in self.__tasks:
+			self.__task = task
+			ins = self.__prog[task.pc]
+			if ins[0] is not DPS_Interpreter.op_wait or task.wtime == 0: 
+				busy = True
+			elif task.condition == None or float(ins[2]) > 0:
+				wake = min(wake,self.__start + task.wtime + float(ins[2]))
+		if busy and self.__stale < self.STALE_STEPS and self.clock() < self.poller.due():
+			self.__stale = self.__stale + 1
+			return False
+		rest = wake - self.clock()
+		if rest > 0: self.sleep(rest)
+		self.__stale = 0
+		return True
+
+	def __save_history(self):
+		"""
+			saves what happened just before a trip in PRE_<date-time>.csv
+		"""
+		if self.dryrun: return
+		fn = 'PRE_'+strftime('%Y%m%d%H%M%S',localtime())+'.csv'
+		n = self.Hist.dump(fn,self.__start)
+		print(str(n)+' readings before the trip saved in '+fn)
+
+	def __run(self,resume):
+		########################################################################
+		# if we made it to here we have a program in memory that is reasonably 
+		# error free. There could still be bugs, like crazy voltage or current
+		# numbers. In such cases the program excution will go ahead and rely on 
+		# the module to react sensibly...  
+		#
+
+		exitcode = 0	# 0 = ok, 1 = error in program or port, 2 = protection, 3 = watchdog
+		try:
+			self.new_task(0)
+			self.__start = self.clock()
+			if resume:
+				runtime = self.load_state()
+				if runtime == None: return 1
+				self.__start = self.__start - runtime
+			lastsave = self.clock() - self.__start
+	
+			while len(self.__tasks) > 0:
+				if self.WD != None and self.WD.tripped.is_set():
+					print('*** WATCHDOG '+self.WD.reason+' ***')
+					if not self.WD.confirmed: res = self.DH.Set_Power(0)
+					self.__save_history()
+					exitcode = 3
+					break
+				if self.poller != None and not self.__reading_due():
+					# no reading due yet, the threads go on with the last one
+					self.__step(self.clock() - self.__start)
+					continue
+				res = self.DH.Read_Output_Values()
+				runtime = self.clock() - self.__start
+				if not res:
+					print('DPS read error')
+					# the connection is lost: wait for its next reopen attempt
+					# here, not in the handler where it would block the watchdog 
+					wait = self.DH.Get_Retry_Delay()
+					if wait > 0: self.sleep(wait)
+				else:
+					w = res.prot
+					if w > 0: 
+						print('*** PROTECTION '+str(w)+' ***')
+						self.__save_history()
+						exitcode = 2
+						break
+					#Rec.do_record(runtime,True)
+		
+					self.__step(runtime)
+					# record with the time of the last reading. That is not always 
+					# the one at the top of the loop, SWEEP and PLAY read themselves 
+					runtime = self.Hist.latest(DPS_History.TIME) - self.__start
+					self.Rec.do_record(runtime,True)
+					if self.checkpoint > 0 and runtime - lastsave >= self.checkpoint:
+						self.__checkpoint(runtime)
+						lastsave = runtime
+			
+		except KeyboardInterrupt:
+			# output off first, then keep the state (with the output as it was)
+			# so the run can be continued with --resume
+			runtime = self.clock() - self.__start
+			onoff = self.DH.Get_ONOFF()
+			res = self.DH.Set_Power(0)
+			if self.checkpoint > 0 and len(self.__tasks) > 0: self.__checkpoint(runtime,onoff)
+			if self.WD != None: self.WD.stop()
+			self.Rec.end_recording()
+			raise
+		except ExprError as err:
+			# like a parser error, but found while running: stop safely
+			print('{:s}:{:d}: {:s}'.format(self.__path,self.__prog[self.__task.pc][1],str(err)))
+			res = self.DH.Set_Power(0)
+			exitcode = 1
+		except Exception:
+			# a bug or something unforeseen: don't leave the output on
+			res = self.DH.Set_Power(0)
+			if self.WD != None: self.WD.stop()
+			raise
+		self.Rec.end_recording()
+		try:
+			if os.path.exists(self.state_name()): os.remove(self.state_name())
+		except OSError as err:
+			print('can\'t remove the state: '+str(err))
+		if self.WD != None: 
+			self.WD.stop()
+			if self.__debug_prog: print('watchdog: '+self.WD.report())
+		out = self.DH.Get_Outages()
+		if len(out) > 0:
+			print('{:d} connection outage(s), total {:.1f}s, longest {:.1f}s'.format(len(out),sum(out),max(out)))
+		if self.__debug_prog: 
+			print('run statistics: '+self.Stats.text())
+			print('recording: '+self.Rec.get_queue_stats())
+			drift = self.Rec.get_drift()
+			if drift != None: print('timing: '+self.Timing.text()+', clock drift {:+.1f}ppm'.format(drift))
+			else:			  print('timing: '+self.Timing.text())
+			if self.poller != None: print('polling: '+self.poller.report())
+			el = self.DH.Get_Elided()
+			if len(el) > 0:
+				print('state cache: {:d} writes skipped ({:s})'.format(sum(el.values()),
+						', '.join(k+' '+str(n) for (k,n) in sorted(el.items()))))
+		# if recfile: 
+				# recfile.close()
+				# recfile = None
+		return exitcode
+
+
+def run_script(path,handler,recorder=None,debug=0,resume=False,**options):
+	"""
+		loads and runs a program file with the handler (DPS_Handler) and
+		returns the exit code (1 = error in the program, see 
+		DPS_Interpreter.run for the others). Without recorder a default 
+		DPS_Recorder is used. Further options are passed on to 
+		DPS_Interpreter
+	"""
+	if recorder == None:
+		from DPS_Recorder import DPS_Recorder
+		recorder = DPS_Recorder(handler)
+	I = DPS_Interpreter(handler,recorder,debug,**options)
+	if not I.load(path): return 1
+	return I.run(resume)
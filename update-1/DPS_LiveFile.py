@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+#MIT License
+#
+#Copyright (c) 2019 TheHWcave
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+#
+
+import mmap, struct
+from time import time
+
+#
+# A live recording file is a preallocated, memory-mapped binary file that 
+# other programs (a live plot for example) can map as well and read new
+# rows from without any parsing. The file is used as a ring: once all rows
+# are used, the oldest rows are overwritten. 
+#
+#	header (64 bytes, little endian):
+#		magic		8s	b'DPSLIVE1'
+#		rowsize		I	bytes per row
+#		capacity	I	number of rows in the file
+#		cursor		Q	total number of rows written so far. Row n is at
+#						slot n % capacity. The cursor is updated after the 
+#						row is complete, so readers never see half a row
+#		start		d	wall clock time (time()) of run time 0
+#		(padding up to 64 bytes)
+#
+#	row (40 bytes, little endian):
+#		time		d	run time in seconds
+#		uset,iset,uout,iout,pout,uin	6f
+#		prot,cvcc	2H
+#		calls		I
+#
+
+HEADER	= struct.Struct('<8sIIQd')
+HEADSIZE= 64
+ROW		= struct.Struct('<d6fHHI')
+MAGIC	= b'DPSLIVE1'
+CURSOR	= 16		# offset of the cursor in the header
+
+class DPS_LiveFile:
+	"""
+		writer side of a live recording file
+	"""
+	__file	= None
+	__map	= None
+	__cap	= 0
+	__cursor= 0
+
+	def __init__(self,fname,capacity,start=None):
+		"""
+			creates fname with room for capacity rows
+			start: wall clock time of run time 0 (default: now)
+		"""
+		if start == None: start = time()
+		self.__cap = capacity
+		self.__cursor = 0
+		self.__file = open(fname,'w+b')
+		self.__file.truncate(HEADSIZE + capacity*ROW.size)
+		self.__map = mmap.mmap(self.__file.fileno(),HEADSIZE + capacity*ROW.size)
+		HEADER.pack_into(self.__map,0,MAGIC,ROW.size,capacity,0,start)
+
+	def write(self,rtime,uset,iset,uout,iout,pout,uin,prot,cvcc,calls):
+		"""
+			writes one row directly into the mapped file
+		"""
+		ROW.pack_into(self.__map,HEADSIZE + (self.__cursor % self.__cap)*ROW.size,
+					  rtime,uset,iset,uout,iout,pout,uin,prot,cvcc,calls)
+		self.__cursor = self.__cursor + 1
+		struct.pack_into('<Q',self.__map,CURSOR,self.__cursor)
+
+	def close(self):
+		if self.__map != None:
+			self.__map.flush()
+			self.__map.close()
+			self.__file.close()
+			self.__map = None
+
+
+class DPS_LiveReader:
+	"""
+		reader side of a live recording file. It maps the file read-only
+		and hands out the new rows since the last call 
+	"""
+	__file	= None
+	__map	= None
+	__cap	= 0
+	__next	= 0			# next row to read
+	start	= 0.0		# wall clock time of run time 0
+
+	def __init__(self,fname):
+		self.__file = open(fname,'rb')
+		self.__map = mmap.mmap(self.__file.fileno(),0,access=mmap.ACCESS_READ)
+		magic,rowsize,self.__cap,cursor,self.start = HEADER.unpack_from(self.__map,0)
+		if magic != MAGIC or rowsize != ROW.size:
+			raise ValueError(fname+' is not a live recording file')
+		self.__next = 0
+
+	def cursor(self):
+		"""
+			returns the number of rows written so far
+		"""
+		return struct.unpack_from('<Q',self.__map,CURSOR)[0]
+
+	def new_rows(self):
+		"""
+			generator for all rows written since the last call. Each row is 
+			a tuple (time,uset,iset,uout,iout,pout,uin,prot,cvcc,calls) 
+			unpacked straight from the mapped memory. If the reader fell 
+			behind by more than the file capacity, the overwritten rows are
+			skipped
+		"""
+		cur = self.cursor()
+		if cur - self.__next > self.__cap: self.__next = cur - self.__cap
+		while self.__next < cur:
+			yield ROW.unpack_from(self.__map,HEADSIZE + (self.__next % self.__cap)*ROW.size)
+			self.__next = self.__next + 1
+
+	def close(self):
+		self.__map.close()
+		self.__file.close()
+
+
+if __name__ == "__main__":
+	#
+	# prints the rows of a live recording file as they arrive 
+	#
+	import argparse
+	from time import sleep
+	parser = argparse.ArgumentParser()
+	parser.add_argument(help='live recording file (REC_xxx.live)',
+						dest='inp_name',action='store',type=str)
+	arg = parser.parse_args()
+	rd = DPS_LiveReader(arg.inp_name)
+	try:
+		while True:
+			for r in rd.new_rows():
+				print('{:5.3f},{:04.2f},{:04.3f},{:04.2f},{:04.3f},{:05.2f},{:04.2f},{:2d},{:2d},{:5d}'.format(*r))
+			sleep(0.1)
+	except KeyboardInterrupt:
+		rd.close()
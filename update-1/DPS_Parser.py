@@ -0,0 +1,569 @@
+#!/usr/bin/env python3
+#MIT License
+#
+#Copyright (c) 2019 TheHWcave
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+#
+
+
+import re, os, sys, pickle, hashlib
+from DPS_Expr import FUNCS, compile_expr
+
+# 
+# these regex strings are used to validate the correct format of the parameters
+#
+re_power  = re.compile('(OFF|ON)$') 	# power: on or off
+re_allkind= re.compile('(C|P|V)$') 		# current, voltage or power as C P or V
+re_setkind= re.compile('(C|V)$') 		# set or inc only allow C or V
+re_limkind= re.compile('(C|P|V|E|T)$') 	# limit: C P V, energy or time
+re_swpkind= re.compile('(C|V|VC)$') 	# sweep: C, V or both
+re_record = re.compile('[01-4]$')	    # record: 0..4
+re_cond   = re.compile('[<=>][=]?$')	# condition:  < <= == >= >
+re_cond0  = re.compile('([<=>][=]?)?$')	# condition or empty
+re_labdef = re.compile('[A-Z]\w*:$')  	# label def: 1 alpha followed by n-alphanum, ends with :
+re_labtgt = re.compile('[A-Z]\w*$')  	# label target: 1 alpha followed by n-alphanum
+re_var    = re.compile('[A-Z]\w*$')  	# variable name: 1 alpha followed by n-alphanum
+re_for    = re.compile('[^:]+:[^:]+(:[^:]+)?$')	# for: from:to or from:to:step
+re_group  = re.compile('[0-9]$')		# preset group: 0..9
+re_recall = re.compile('[1-9]$')		# recall: preset group 1..9
+re_preset = re.compile('[^:]*(:[^:]*){0,4}$')	# preset: uset:iset:ovp:ocp:opp, empty = keep
+re_pnum   = re.compile('^(?=.)([+]?([0-9]*)(\.([0-9]+))?)$') # positive integer or float
+re_num    = re.compile('^(?=.)([+-]?([0-9]*)(\.([0-9]+))?)$') # positive or negative integer or float
+re_any1   = re.compile('.+$')			# any characters except empty or line break
+re_num0   = re.compile('^([+-]?([0-9]*)(\.([0-9]+))?)$') # number or empty
+re_any0   = re.compile('.*$')			# any characters or empty except line break
+								# IF kinds: C P V, C_AVG(2S), DV/DT(2S), STABLE(V,0.01,3S)
+re_ifwin  = re.compile('(C|P|V)_(AVG|MIN|MAX)\(([0-9]*\.?[0-9]+)S?\)$')
+re_ifddt  = re.compile('D(C|P|V)/DT(\(([0-9]*\.?[0-9]+)S?\))?$')
+re_ifstab = re.compile('STABLE\((C|P|V),([0-9]*\.?[0-9]+),([0-9]*\.?[0-9]+)S?\)$')
+re_ifstat = re.compile('(?:(C|P|V)_(MEAN|STD|EWMA)|(E|Q))$')
+re_ifkind = re.compile('((C|P|V)|(C|P|V)_(MEAN|STD|EWMA)|(E|Q)|(C|P|V)_(AVG|MIN|MAX)\(.*\)|D(C|P|V)/DT(\(.*\))?|STABLE\(.*\))$')
+re_range  = '[+]?[0-9]*\.?[0-9]+:[+]?[0-9]*\.?[0-9]+:[+-]?[0-9]*\.?[0-9]+:[+]?[0-9]*\.?[0-9]+'
+re_sweep  = re.compile('(@.+|'+re_range+'(,'+re_range+')?)$') # sweep: range, 2 ranges or @file
+
+#
+# table of operations. Each entry consists of:
+#	- the number of parameters (0 .. 3) following the opcode
+#	- the regex to validate parameter1
+#	- the regex to validate parameter2  (or None )
+#	- the regex to validate parameter3  (or None )
+# The interpreter has a function for each opcode
+#
+OPS = {
+		'BRANCH'  :(0,None,None,None),
+		'CALL'    :(3,re_any1,re_any0,re_any0),
+		'CALLSUB' :(1,re_labtgt,None,None),
+		'END'     :(0,None,None,None),
+		'FOR'     :(2,re_var,re_for,None),
+		'GOTO'    :(1,re_labtgt,None,None),
+		'IF'	  :(3,re_ifkind,re_cond0,re_num0),
+		'INC'     :(2,re_setkind,re_num,None),
+		'LET'     :(2,re_var,re_num,None),
+		'LIMIT'   :(2,re_limkind,re_pnum,None),
+		'SET'     :(2,re_setkind,re_pnum,None),
+		'SPAWN'   :(1,re_labtgt,None,None),
+		'SWEEP'   :(3,re_swpkind,re_sweep,re_any0),
+		'MAX'     :(2,re_allkind,re_pnum,None),
+		'NEXT'    :(1,re_var,None,None),
+		'OUTPUT'  :(1,re_power,None,None),
+		'PARALLEL':(0,None,None,None),
+		'PLAY'    :(1,re_any1,None,None),
+		'PRESET'  :(2,re_group,re_preset,None),
+		'RECALL'  :(1,re_recall,None,None),
+		'RECORD'  :(2,re_record,re_pnum,None),
+		'RETURN'  :(0,None,None,None),
+		'WAIT'    :(1,re_pnum,None,None)
+}
+
+JUMPS	 = ('GOTO','SPAWN','CALLSUB')	# operations with a label as target
+READINGS = ('UOUT','IOUT','POUT','UIN','USET','ISET','T')	# readings usable in expressions
+
+CACHE_DIR	  = '__dpscache__'
+CACHE_VERSION = 3	# increase when the compiled program format changes
+
+class Table(str):
+	"""
+		the name of a table file as written in the program (PLAY, SWEEP 
+		@file) with the rows of the file, read by the parser: a tuple of 
+		rows, each a tuple of floats. path is the full name of the file, 
+		the same name may stand for different files in INCLUDEd programs
+	"""
+	rows = ()
+	path = ''
+
+def tokenize(line):
+	"""
+		breaks a line into words and returns a list of (word, column) with
+		the column starting at 1. Words are separated by blanks, everything 
+		after # is a comment. Text in quotes ('' or "") is one word (without
+		the quotes), blanks inside brackets are removed so that something 
+		like stable(V, 0.01, 3s) stays one word. 
+		
+		Raises ValueError(message, column) for a missing closing quote or
+		bracket
+	"""
+	words = []
+	n = 0
+	end = len(line)
+	while n < end:
+		c = line[n]
+		if c in ' \t\r\n':
+			n = n + 1
+		elif c == '#':
+			break
+		elif c in '\'"':
+			close = line.find(c,n+1)
+			if close < 0: raise ValueError('missing closing quote',n+1)
+			words.append((line[n+1:close],n+1))
+			n = close + 1
+		else:
+			start = n
+			word = ''
+			depth = 0
+			while n < end:
+				c = line[n]
+				if c == '(': depth = depth + 1
+				elif c == ')': depth = depth - 1
+				elif c in ' \t\r\n':
+					if depth <= 0: break
+					n = n + 1
+					continue
+				elif c == '#' and depth <= 0: break
+				word = word + c
+				n = n + 1
+			if depth > 0: raise ValueError('missing closing bracket',start+1)
+			words.append((word,start+1))
+	return words
+
+
+class DPS_Parser:
+	"""
+		compiles a program file into the program code for DPS_Interpreter.
+		Each instruction becomes a tuple
+			(opcode, line, parameter1, parameter2, parameter3)
+		Numbers that are expressions are compiled (DPS_Expr), jump targets
+		are resolved to program positions and the parts of PARALLEL and 
+		FOR blocks get each others positions.
+		
+		The parser doesn't stop at the first error, all errors of the file
+		are collected with file name, line and column (see get_errors). 
+		
+		INCLUDE <file> inserts another program file at that place (the name
+		is relative to the including file). The table files of PLAY and 
+		SWEEP @file are read and checked here too, also relative to the 
+		file that names them.
+		
+		The compiled program is saved in __dpscache__ next to the program 
+		file. The next time the same program is loaded the saved version 
+		is used as long as none of its files have changed (same size and 
+		modification time, or else the same SHA1 hash)
+	"""
+	
+	__prog		= []		# the compiled program
+	__labels	= {}		# program position of each label
+	__errors	= []		# (file, line, column, message, text) of each error
+	__files		= []		# all files read: (name, size, mtime, sha1)
+	__jumps		= []		# (label, file, line, column, program position, text) of each jump
+	__blocks	= []		# PARALLEL blocks still open: [pc, [BRANCH pcs], file, line, column, text]
+	__fors		= []		# FOR loops still open: (variable, pc, file, line, column, text)
+	__assigned	= set()		# variable names that get a value somewhere (LET or FOR)
+	__used		= []		# (name, file, line, column, text) of variables used in expressions
+	__includes	= []		# files being read right now, to find include loops
+	__why		= ''		# why the last expression could not be compiled
+	__text		= ''		# the line being compiled
+	__cache		= True		# use the parse cache
+	__fromcache	= False		# the last parse() came from the cache
+	
+	def __init__(self,cache=True):
+		self.__cache = cache
+		
+	def get_errors(self): return list(self.__errors)
+	
+	def get_labels(self): return dict(self.__labels)
+	
+	def from_cache(self): return self.__fromcache
+	
+	def print_errors(self):
+		"""
+			prints all errors, each with the line it was found in
+		"""
+		for (fname,line,col,msg,text) in self.__errors:
+			print('{:s}:{:d}:{:d}: {:s}'.format(fname,line,col,msg))
+			if text != '':
+				print('    '+text.rstrip('\n').replace('\t',' '))
+				print('    '+' '*(col-1)+'^')
+		
+	def listing(self):
+		"""
+			prints the compiled program and the labels
+		"""
+		n = 0
+		for ins in self.__prog:
+			print(n,end='')
+			print(ins)
+			n = n + 1
+		for (label,pc) in sorted(self.__labels.items(),key=lambda l: l[1]):
+			print(label+': '+str(pc))
+		
+	def __error(self,fname,line,col,msg,text=''):
+		self.__errors.append((fname,line,col,msg,text))
+		
+	def parse(self,path):
+		"""
+			compiles the program file path. Returns the program (a list of 
+			instructions) or None if there were errors 
+		"""
+		self.__fromcache = False
+		if self.__cache:
+			prog = self.__load_cache(path)
+			if prog != None: 
+				self.__fromcache = True
+				return prog
+		self.__prog		= []
+		self.__labels	= {}
+		self.__errors	= []
+		self.__files	= []
+		self.__jumps	= []
+		self.__blocks	= []
+		self.__fors		= []
+		self.__assigned	= set()
+		self.__used		= []
+		self.__includes	= []
+		self.__parse_file(path,'',0,0)
+		self.__finish()
+		if len(self.__errors) > 0: return None
+		if self.__cache: self.__save_cache(path)
+		return self.__prog
+		
+	def __parse_file(self,path,fname,line,col):
+		"""
+			reads one file. fname, line and col tell where it was included
+			from (for error messages)
+		"""
+		apath = os.path.abspath(path)
+		if apath in self.__includes:
+			self.__error(fname,line,col,'INCLUDE loop: '+path)
+			return
+		try:
+			with open(path,'rb') as f:
+				data = f.read()
+		except OSError as err:
+			if fname == '': self.__error(path,0,0,'can\'t read file: '+str(err.strerror))
+			else:			self.__error(fname,line,col,'can\'t read file: '+path)
+			return
+		st = os.stat(path)
+		self.__files.append((apath,st.st_size,st.st_mtime_ns,hashlib.sha1(data).hexdigest()))
+		self.__includes.append(apath)
+		for (n,text) in enumerate(data.decode('utf-8','replace').splitlines(),1):
+			self.__parse_line(path,n,text)
+		self.__includes.pop()
+		
+	def __read_table(self,name,fname,ncols):
+		"""
+			reads a table file for SWEEP or PLAY: numbers separated by blanks
+			or commas, one row per line, everything after # is a comment. 
+			name is relative to the program file fname. Every row needs at 
+			least ncols numbers. Returns the full path and the rows, raises 
+			ValueError with what is wrong
+		"""
+		path = name
+		if not os.path.isabs(path): path = os.path.join(os.path.dirname(fname),path)
+		try:
+			with open(path,'rb') as f:
+				data = f.read()
+		except OSError as err:
+			raise ValueError('can\'t read table '+name+': '+str(err.strerror))
+		rows = []
+		for (n,text) in enumerate(data.decode('utf-8','replace').splitlines(),1):
+			com = text.find('#')
+			if com >=0: text = text[:com]
+			try:
+				col = tuple(float(x) for x in text.replace(',',' ').split())
+			except ValueError:
+				raise ValueError('table '+name+' line '+str(n)+': not a number')
+			if len(col) == 0: continue
+			if len(col) < ncols:
+				raise ValueError('table '+name+' line '+str(n)+': needs '+str(ncols)+' numbers')
+			rows.append(col)
+		if len(rows) == 0: raise ValueError('table '+name+' is empty')
+		st = os.stat(path)
+		path = os.path.abspath(path)
+		self.__files.append((path,st.st_size,st.st_mtime_ns,hashlib.sha1(data).hexdigest()))
+		return (path,tuple(rows))
+		
+	def __parse_param(self,rx,p,fname,line,col):
+		"""
+			validates the parameter p with the regex rx. Where a number is 
+			expected an expression is allowed too, it gets compiled here. 
+			Returns the parameter (an Expr for an expression) or None if it
+			isn't valid
+		"""
+		self.__why = ''
+		if rx.match(p.upper()): return p
+		if rx in (re_pnum,re_num,re_num0) and p != '':
+			try:
+				e = compile_expr(p)
+			except ValueError as err:
+				self.__why = str(err)
+				return None
+			for name in e.names: self.__used.append((name,fname,line,col,self.__text))
+			return e
+		return None
+		
+	def __parse_line(self,fname,line,text):
+		"""
+			compiles one line of the program. Errors are noted and the line
+			is skipped
+		"""
+		def error(col,msg): self.__error(fname,line,col,msg,text)
+		
+		self.__text = text		
+		try:
+			words = tokenize(text)
+		except ValueError as err:
+			error(err.args[1],err.args[0])
+			return
+		if len(words) == 0: return
+		#
+		# the line is:  [label:] opcode [param1 [param2 [param3]]]
+		#
+		label = ''
+		if re_labdef.match(words[0][0].upper()):
+			(label,lcol) = words[0]
+			label = label[:-1].upper()
+			words = words[1:]
+			if len(words) == 0:
+				error(lcol,'label without operation')
+				return
+		(opstr,ocol) = words[0]
+		opstr = opstr.upper()
+		params = words[1:]
+		if opstr == 'INCLUDE':
+			if label != '' or len(params) != 1:
+				error(ocol,'INCLUDE needs a file name and no label')
+				return
+			(name,pcol) = params[0]
+			if not os.path.isabs(name): name = os.path.join(os.path.dirname(fname),name)
+			self.__parse_file(name,fname,line,pcol)
+			return
+		if opstr not in OPS:
+			error(ocol,'unknown operation: '+words[0][0])
+			return
+		op = OPS[opstr]
+		if len(params) > op[0]:
+			if op[0] == 0: error(params[0][1],opstr+' has no parameters')
+			else:		   error(params[op[0]][1],'too many parameters, '+opstr+' has '+str(op[0]))
+			return
+		while len(params) < 3: params.append(('',len(text)+1))
+		#
+		# check the format of the parameters
+		#
+		p = ['','','']
+		for n in range(op[0]):
+			(word,pcol) = params[n]
+			p[n] = self.__parse_param(op[1+n],word,fname,line,pcol)
+			if p[n] == None:
+				if word == '': 			error(pcol,'missing parameter')
+				elif self.__why != '':	error(pcol,'expression error in '+word+': '+self.__why)
+				else: 		   			error(pcol,'parameter validation error in: '+word)
+				return
+		(param1,param2,param3) = p
+		pc = len(self.__prog)
+		#
+		# IF needs a closer look: stable() comes without condition
+		# and value, everything else needs both
+		#
+		if opstr == 'IF':
+			k = param1.upper()
+			if (k.startswith('STABLE') and re_ifstab.match(k) and param2 == '' and param3 == ''):
+				pass
+			elif (not k.startswith('STABLE') and param2 != '' and param3 != '' and
+				(re_allkind.match(k) or re_ifstat.match(k) or re_ifwin.match(k) or re_ifddt.match(k))):
+				pass
+			else:
+				error(params[0][1],'invalid condition: '+param1+' '+param2+' '+param3)
+				return
+		#
+		# SWEEP VC needs two ranges, V and C only one
+		#
+		elif opstr == 'SWEEP' and not param2.startswith('@'):
+			if (param1.upper() == 'VC') != (',' in param2):
+				error(params[1][1],'VC needs two ranges, V or C one: '+param2)
+				return
+		#
+		# table files: time uset iset for PLAY, value dwell for SWEEP V
+		# or C and volts amps dwell for SWEEP VC
+		#
+		try:
+			if opstr == 'SWEEP' and param2.startswith('@'):
+				(path,rows) = self.__read_table(param2[1:],fname,3 if param1.upper() == 'VC' else 2)
+				param2 = Table(param2)
+				(param2.path,param2.rows) = (path,rows)
+			elif opstr == 'PLAY':
+				(path,rows) = self.__read_table(param1,fname,3)
+				param1 = Table(param1)
+				(param1.path,param1.rows) = (path,rows)
+		except ValueError as err:
+			error(params[1 if opstr == 'SWEEP' else 0][1],str(err))
+			return
+		#
+		# variables can't have the name of a reading or function
+		#
+		if opstr in ('LET','FOR','NEXT'):
+			param1 = param1.upper()
+			if param1 in READINGS or param1 in FUNCS:
+				error(params[0][1],param1+' is reserved and can\'t be used as variable')
+				return
+			self.__assigned.add(param1)
+		if opstr == 'FOR':
+			spec = [self.__parse_param(re_num,x,fname,line,params[1][1]) for x in param2.split(':')]
+			if None in spec:
+				error(params[1][1],'invalid loop range: '+param2)
+				return
+			if len(spec) == 2: spec.append(None)
+			param2 = tuple(spec)
+		if opstr == 'PRESET':
+			parts = param2.split(':')
+			spec = [None if x == '' else self.__parse_param(re_pnum,x,fname,line,params[1][1]) for x in parts]
+			if all(x == '' for x in parts) or any(x != '' and v == None for (x,v) in zip(parts,spec)):
+				error(params[1][1],'invalid preset values: '+param2)
+				return
+			param2 = tuple(spec)
+		#
+		# PARALLEL, BRANCH and END get the program positions of 
+		# the other parts of their block. The END of a block fills 
+		# them in, an END outside of a block gets None
+		#
+		if opstr == 'PARALLEL':
+			self.__blocks.append([pc,[],fname,line,ocol,text])
+		elif opstr == 'BRANCH':
+			if len(self.__blocks) == 0:
+				error(ocol,'BRANCH outside of PARALLEL')
+				return
+			self.__blocks[-1][1].append(pc)
+		elif opstr == 'NEXT':
+			if len(self.__fors) == 0 or self.__fors[-1][0] != param1:
+				error(params[0][1],'NEXT '+param1+' without FOR '+param1)
+				return
+		elif opstr in JUMPS:
+			param1 = param1.upper()
+			self.__jumps.append((param1,fname,line,params[0][1],pc,text))
+		#
+		# We have a valid operation and valid parameters. Lets
+		# add them to the program code
+		#
+		self.__prog.append((opstr,line,param1,param2,param3))
+		if opstr == 'END' and len(self.__blocks) > 0:
+			(parpc,branches,bf,bl,bc,bt) = self.__blocks.pop()
+			self.__prog[parpc] = ('PARALLEL',self.__prog[parpc][1],tuple(branches),pc,'')
+			for b in branches + [pc]:
+				self.__prog[b] = (self.__prog[b][0],self.__prog[b][1],parpc,pc,'')
+		elif opstr == 'END':
+			self.__prog[pc] = ('END',line,None,None,'')
+		#
+		# FOR and NEXT get each others positions
+		#
+		elif opstr == 'FOR':
+			self.__fors.append((param1,pc,fname,line,ocol,text))
+		elif opstr == 'NEXT':
+			(var,forpc,ff,fl,fc,ft) = self.__fors.pop()
+			self.__prog[forpc] = self.__prog[forpc][:4]+(pc,)
+			self.__prog[pc] = ('NEXT',line,param1,forpc,'')
+		# 
+		# if the input line had a label, we need to associate it 
+		# with the line (pc) of the program code. They are different!
+		# Also check that all labels are unique 
+		#
+		if label != '':
+			if label in self.__labels:
+				error(lcol,'duplicate label def: '+label)
+			else:
+				self.__labels[label] = pc
+				
+	def __finish(self):
+		"""
+			checks everything that needs the whole program: open blocks, 
+			jump targets (a jump may come before its label) and variables
+			that never get a value. The jump targets are filled into the 
+			instructions so no label has to be looked up while running
+		"""
+		for (parpc,branches,fname,line,col,text) in self.__blocks:
+			self.__error(fname,line,col,'PARALLEL has no END',text)
+		for (var,forpc,fname,line,col,text) in self.__fors:
+			self.__error(fname,line,col,'FOR has no NEXT',text)
+		for (label,fname,line,col,pc,text) in self.__jumps:
+			if label not in self.__labels:
+				self.__error(fname,line,col,'label '+label+' not found',text)
+			else:
+				ins = self.__prog[pc]
+				self.__prog[pc] = (ins[0],ins[1],ins[2],self.__labels[label],ins[4])
+		for (name,fname,line,col,text) in self.__used:
+			if name not in self.__assigned and name not in READINGS:
+				self.__error(fname,line,col,'variable '+name+' never gets a value',text)
+		order = {f[0]:n for (n,f) in enumerate(self.__files)}
+		self.__errors.sort(key=lambda e: (order.get(os.path.abspath(e[0]),0),e[1],e[2]))
+	
+	# 
+	# parse cache
+	#
+	
+	def __cache_name(self,path):
+		(d,f) = os.path.split(os.path.abspath(path))
+		return os.path.join(d,CACHE_DIR,f+'.pickle')
+		
+	def __load_cache(self,path):
+		"""
+			returns the saved program if it is still up to date, or None 
+		"""
+		try:
+			with open(self.__cache_name(path),'rb') as f:
+				saved = pickle.load(f)
+		except Exception:
+			return None
+		if saved.get('version') != (CACHE_VERSION,sys.version): return None
+		for (name,size,mtime,sha1) in saved['files']:
+			try:
+				st = os.stat(name)
+				if st.st_size == size and st.st_mtime_ns == mtime: continue
+				with open(name,'rb') as f:
+					if hashlib.sha1(f.read()).hexdigest() == sha1: continue
+			except OSError: pass
+			return None
+		self.__prog	  = saved['prog']
+		self.__labels = saved['labels']
+		self.__errors = []
+		self.__files  = saved['files']
+		return self.__prog
+		
+	def __save_cache(self,path):
+		"""
+			saves the compiled program. Failing to save it is not an error
+		"""
+		fname = self.__cache_name(path)
+		try:
+			os.makedirs(os.path.dirname(fname),exist_ok=True)
+			# each process its own temporary file, DPS_Batch may compile 
+			# the same program in several jobs at once
+			tmp = fname+'.'+str(os.getpid())+'.tmp'
+			with open(tmp,'wb') as f:
+				pickle.dump({'version':(CACHE_VERSION,sys.version),'files':self.__files,
+							 'prog':self.__prog,'labels':self.__labels},f,pickle.HIGHEST_PROTOCOL)
+			os.replace(tmp,fname)
+		except OSError: pass
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+#MIT License
+#
+#Copyright (c) 2019 TheHWcave
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+#
+from DPS_Handler import Sample
+
+class DPS_Poller:
+	"""
+		Decides when the interpreter reads the module next. As long as the
+		readings stay within the deadbands the time between readings is 
+		doubled with every reading, up to tmax. It drops back to tmin at 
+		once when 
+			- a setting was written to the module (SET, OUTPUT, RECALL ..)
+			- UOUT or IOUT moved by a deadband or more since the last reading
+			- the setpoints, CV/CC or the protection state changed
+		and it stops growing while UOUT or IOUT change fast enough to move 
+		by a deadband within the next, longer interval (a slope). 
+		
+		Register add_from with DPS_Handler.Add_Listener to feed it
+	"""
+	
+	DEADBAND_U	= 0.02		# UOUT change that counts as activity (as for change-based recording)
+	DEADBAND_I	= 0.002		# IOUT change that counts as activity
+	STEP		= 0.1		# first interval after tmin = 0 (as fast as possible)
+	
+	__DH		= None
+	__tmin		= 0.0		# shortest time between readings (0 = as fast as possible)
+	__tmax		= 1.0		# longest time between readings
+	__interval	= 0.0		# present time between readings
+	__last		= None		# the previous reading (a Sample)
+	__writes	= 0			# successful writes of the handler at the last reading
+	__reads		= 0			# readings so far
+	__rampups	= 0			# number of times the interval dropped back to tmin
+	
+	def __init__(self,DH,tmin,tmax):
+		"""
+			DH	: DPS_Handler, its writes are watched
+			tmin: shortest time between readings in seconds 
+			tmax: longest time between readings in seconds 
+		"""
+		self.__DH		= DH
+		self.__tmin		= tmin
+		self.__tmax		= max(tmin,tmax)
+		self.__interval	= tmin
+		
+	def __active(self,s,o):
+		"""
+			True if the reading s differs from the previous reading o by more
+			than the deadbands or in its settings or state
+		"""
+		return (abs(s.uout - o.uout) >= self.DEADBAND_U or
+				abs(s.iout - o.iout) >= self.DEADBAND_I or
+				s[Sample.USET:Sample.ISET+1] != o[Sample.USET:Sample.ISET+1] or
+				s[Sample.PROT:Sample.CVCC+1] != o[Sample.PROT:Sample.CVCC+1])
+		
+	def add_from(self,s):
+		"""
+			listener for DPS_Handler.Add_Listener: adapts the interval to 
+			the new reading s (a Sample)
+		"""
+		o = self.__last
+		self.__last = s
+		self.__reads = self.__reads + 1
+		writes = self.__DH.Get_Writes()
+		if o == None or writes != self.__writes or self.__active(s,o):
+			if self.__interval > self.__tmin: self.__rampups = self.__rampups + 1
+			self.__interval = self.__tmin
+		else:
+			longer = min(self.__tmax,max(2*self.__interval,self.STEP))
+			dt = s.t - o.t
+			if dt > 0 and (abs(s.uout - o.uout) / dt * longer >= self.DEADBAND_U or
+						   abs(s.iout - o.iout) / dt * longer >= self.DEADBAND_I):
+				pass	# on a slope, keep the interval
+			else:
+				self.__interval = longer
+		self.__writes = writes
+		
+	def due(self):
+		"""
+			returns the clock() time when the next reading is due. After a 
+			write the next reading is due at once
+		"""
+		if self.__last == None or self.__DH.Get_Writes() != self.__writes: 
+			return 0.0
+		return self.__last[Sample.TREQ] + self.__interval
+		
+	def report(self):
+		"""
+			returns a one line summary
+		"""
+		return '{:d} readings, interval {:.2f}..{:.2f}s, back to {:.2f}s {:d} times, now {:.2f}s'.format(
+				self.__reads,self.__tmin,self.__tmax,self.__tmin,self.__rampups,self.__interval)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+#MIT License
+#
+#Copyright (c) 2019 TheHWcave
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+#
+
+import argparse, serial
+from DPS_Handler import DPS_Handler
+
+#
+# Downloads, uploads and compares the preset groups of a DPS module. A 
+# preset file has one line per group:
+#
+#	group uset iset ovp ocp opp
+#
+# with anything after # being a comment. Each group is read and written 
+# with a single message. On upload only the groups that differ from the
+# module are written.
+#
+
+def read_file(fname):
+	"""
+		returns {group: (uset, iset, ovp, ocp, opp)} from a preset file.
+		Raises ValueError for a line that can't be read
+	"""
+	res = {}
+	with open(fname,'r') as f:
+		for (n,line) in enumerate(f,1):
+			words = line.partition('#')[0].split()
+			if len(words) == 0: continue
+			try:
+				if len(words) != 6: raise ValueError
+				group = int(words[0])
+				if not 0 <= group <= 9: raise ValueError
+				res[group] = tuple(float(w) for w in words[1:])
+			except ValueError:
+				raise ValueError(fname+':'+str(n)+': expected "group uset iset ovp ocp opp"')
+	return res
+	
+def show(group,p):
+	print('{:d} {:6.2f} {:6.3f} {:6.2f} {:6.3f} {:6.2f}'.format(group,*p[:5]))
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description='download, upload or compare the preset groups of a DPS module')
+	parser.add_argument(help='show: print the groups, load: write the groups of the file, diff: compare with the file',
+						dest='cmd',action='store',type=str,choices=['show','load','diff'])
+	parser.add_argument(help='preset file (for load and diff)',nargs='?',
+						dest='fname',action='store',type=str,default='')
+	parser.add_argument('--port','-p',help='port',required=True,
+						dest='port',action='store',type=str)
+	parser.add_argument('--speed','-s',help='speed (default=19200)',
+						dest='speed',action='store',type=int,default=19200)
+	arg = parser.parse_args()
+	if arg.cmd == 'show':
+		presets = {}
+	elif arg.fname == '':
+		parser.error(arg.cmd+' needs a preset file')
+	else:
+		try:
+			presets = read_file(arg.fname)
+		except (OSError,ValueError) as err:
+			print(err)
+			exit(1)
+	DH = DPS_Handler(arg.port,arg.speed)
+	try:
+		DH.Connect()
+	except serial.serialutil.SerialException:
+		print('could not open '+arg.port)
+		exit(1)
+	res = 0
+	for group in range(10):
+		if arg.cmd != 'show' and group not in presets: continue
+		if not DH.Read_Preset(group):
+			print('group {:d}: read error'.format(group))
+			res = 1
+			continue
+		if arg.cmd == 'show':
+			show(group,DH.Get_Preset(group))
+			continue
+		diff = DH.Diff_Preset(group,presets[group])
+		for (field,old,new) in diff:
+			print('group {:d} {:4s}: {:g} -> {:g}'.format(group,field,old,new))
+		if arg.cmd == 'diff':
+			if len(diff) > 0: res = 2
+		elif len(diff) > 0 and not DH.Write_Preset(group,presets[group]):
+			print('group {:d}: write error'.format(group))
+			res = 1
+	exit(res)
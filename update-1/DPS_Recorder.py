@@ -22,7 +22,10 @@
 #SOFTWARE.
 #
 
-import copy
+import copy, os, gzip, shutil, threading, queue
+from DPS_LiveFile import DPS_LiveFile
+from DPS_Handler import Sample, NO_SAMPLE
+import DPS_Export
 from time import sleep,time,localtime,strftime,perf_counter
 
 class DPS_Recorder:
@@ -35,24 +38,55 @@ class DPS_Recorder:
 	__recfreq		= 0.0  # time between recordings
 	__reclast		= 0.0  # last time something was recorded
 	__callcnt		= 0    # counts the number of calls
+	__statfile		= None # summary file, one row per call
+	__livesize		= 0    # rows in the live recording file, 0 = no live file
+	__livefile		= None
+	__colfmt		= ''   # columnar export format ('npz' or 'parquet'), '' = none
+	__cols			= None # channel arrays for the columnar export
+	__calls			= None # [row, calls, res, cmt] of all rows with a call result or comment
+	__meta			= {}   # run metadata for the columnar export
+	__colname		= ''   # recording name for the columnar export
+	__rotbytes		= 0    # start a new segment after this many bytes, 0 = never
+	__rottime		= 0.0  # start a new segment after this many seconds, 0 = never
+	__compress		= False# gzip closed segments in the background
+	__segment		= 0    # number of the present segment
+	__segname		= ''   # file name of the present segment
+	__segbytes		= 0    # bytes written into the present segment
+	__segrows		= 0    # rows written into the present segment
+	__segstart		= 0.0  # run time of the first row in the present segment
+	__segend		= 0.0  # run time of the last row in the present segment
+	__idxfile		= None # segment index file
+	__zipq			= None # queue of segments to compress
+	__zipper		= None # thread compressing the segments
+	__qsize			= 1000 # rows that can wait for the writer thread, 0 = no writer thread
+	__qdrop			= False# True: drop rows if the queue is full, False: wait
+	__writeq		= None # queue of rows for the writer thread
+	__writer		= None # thread that formats and writes the rows
+	__nqueued		= 0    # rows handed to the writer
+	__ndropped		= 0    # rows dropped because the queue was full
+	__maxdepth		= 0    # highest number of rows waiting in the queue
+	__tblocked		= 0.0  # total time spent waiting for room in the queue
+	__append		= False# True: the next segment continues an existing file
+	__dryrun		= False# True: rows are only counted, no files are written
+	__anchor		= None # (time(), handler clock()) taken at the start of the recording
+	__drift			= None # drift of the wall clock against the handler clock in ppm
+	
+	DEADBAND_U		= 0.02		# minimum UOUT change recorded in mode 3
+	DEADBAND_I		= 0.002		# minimum IOUT change recorded in mode 3
 	
 	__data_skip	 	= 0
 					# Each of the _data_xxx tuples stores the following:
-					# RTIME UOUT IOUT POUT  UIN  USET ISET PROT CVCC CALL
-	__data_old = (0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0, 0, 0) 
+					# RTIME SAMPLE CALL EPOCH
+					# The Sample of the handler is shared, not copied. Its
+					# values are only scaled when the row is written
+	__data_old = (0.0, NO_SAMPLE, 0, 0.0) 
 	__data_prev= ()
 	__data_now = ()
 					# definitions to index the __data_xxx tuples
 	RTIME=0
-	UOUT= 1
-	IOUT= 2
-	POUT= 3
-	UIN = 4
-	USET= 5
-	ISET= 6
-	PROT= 7
-	CVCC= 8
-	CALL= 9
+	SAMPLE=1	# the reading (a Sample)
+	CALL= 2
+	EPOCH=3		# wall clock time of the reading
 	
 	
 
@@ -72,10 +106,323 @@ class DPS_Recorder:
 		self.__recmode = recmode
 		self.__recfreq = recfreq
 			
-	def end_recording(self):
-		if self.__recfile != None:
+	def set_live(self,rows):
+		"""
+			rows > 0 : every recorded row is also written into a memory-mapped
+					   live recording file REC_<name>.live with room for this
+					   many rows (see DPS_LiveFile)
+		"""
+		self.__livesize = rows
+			
+	def set_columnar(self,fmt,meta={}):
+		"""
+			fmt: 'npz' or 'parquet' : at the end of the recording, all recorded
+				 rows are also saved as REC_<name>.<fmt> with one array per 
+				 channel (see DPS_Export). '' = off
+			meta: dictionary with run information saved with the arrays
+		"""
+		self.__colfmt = fmt
+		self.__meta = dict(meta)
+		
+	def set_rotation(self,maxbytes,maxtime,compress=False):
+		"""
+			splits a recording into segments REC_<name>_0001.csv, _0002 ..
+			maxbytes: start a new segment when the present one reaches this
+					  size, 0 = no size limit
+			maxtime : start a new segment after this many seconds, 0 = no
+					  time limit
+			compress: gzip closed segments in a background thread
+			
+			The segments are listed with their time ranges in REC_<name>.idx. 
+			Each segment is written to disk (fsync) when it is closed, so a 
+			crash only loses the present segment. 
+		"""
+		self.__rotbytes = maxbytes
+		self.__rottime  = maxtime
+		self.__compress = compress
+		
+	def get_state(self):
+		"""
+			returns a dictionary with everything needed to continue the
+			present recording later with resume_recording
+		"""
+		return {'recname':self.__recname, 'recmode':self.__recmode, 'recfreq':self.__recfreq,
+				'callcnt':self.__callcnt, 'segment':self.__segment}
+		
+	def resume_recording(self,state):
+		"""
+			continues a recording from a state saved with get_state. New rows 
+			are appended to the recording file. With rotation a new segment 
+			is started, the interrupted segment is left as it is
+		"""
+		self.__recmode = state['recmode']
+		self.__recfreq = state['recfreq']
+		self.__callcnt = state['callcnt']
+		self.__recname = state['recname']
+		if self.__recname != '':
+			self.__append = not self.__rotating()
+			self.__segment = state['segment']
+			if self.__colfmt != '':
+				self.__cols  = DPS_Export.new_columns()
+				self.__calls = []
+				self.__colname = self.__recname+'_resumed'
+		
+	def set_queue(self,size,drop=False):
+		"""
+			Rows are formatted and written by a separate writer thread, so a
+			slow disk does not hold up the program. 
+			size : number of rows that can wait for the writer. 0 = no writer
+				   thread, rows are written directly
+			drop : what to do if the queue is full. True: drop the row, 
+				   False: wait until there is room again
+		"""
+		self.__qsize = size
+		self.__qdrop = drop
+		
+	def set_dryrun(self,on):
+		"""
+			on: True = the rows are only counted, no recording files are
+				written (for dry runs, see DPS_Sim)
+		"""
+		self.__dryrun = on
+		
+	def get_rows(self): return self.__nqueued	# rows recorded so far
+		
+	def get_queue_stats(self):
+		"""
+			returns a one line summary of the writer queue
+		"""
+		return '{:d} rows queued, {:d} dropped, max queue depth {:d}/{:d}, waited {:.3f}s'.format(
+				self.__nqueued,self.__ndropped,self.__maxdepth,self.__qsize,self.__tblocked)
+		
+	def __enqueue(self,data,cres='',ccmt=''):
+		"""
+			hands a row over to the writer thread (starts it if needed)
+		"""
+		if self.__dryrun:
+			self.__nqueued = self.__nqueued + 1
+			return
+		if self.__qsize <= 0:
+			self.__write_row(data,cres,ccmt)
+			return
+		if self.__writer == None:
+			self.__writeq = queue.Queue(self.__qsize)
+			self.__writer = threading.Thread(target=self.__write_rows,name='DPS_Writer',daemon=True)
+			self.__writer.start()
+		try:
+			self.__writeq.put_nowait((data,cres,ccmt))
+		except queue.Full:
+			if self.__qdrop:
+				self.__ndropped = self.__ndropped + 1
+				return
+			t = perf_counter()
+			self.__writeq.put((data,cres,ccmt))
+			self.__tblocked = self.__tblocked + perf_counter() - t
+		self.__nqueued = self.__nqueued + 1
+		depth = self.__writeq.qsize()
+		if depth > self.__maxdepth: self.__maxdepth = depth
+		
+	def __write_rows(self):
+		"""
+			writer thread: writes the queued rows. None ends the thread 
+		"""
+		while True:
+			item = self.__writeq.get()
+			if item == None: break
+			self.__write_row(*item)
+			
+	def __rotating(self): return self.__rotbytes > 0 or self.__rottime > 0
+		
+	def __open_segment(self,rtime):
+		"""
+			opens the next recording file
+		"""
+		if self.__rotating():
+			self.__segment = self.__segment + 1
+			self.__segname = 'REC_'+self.__recname+'_{:04d}.csv'.format(self.__segment)
+		else:
+			self.__segname = 'REC_'+self.__recname+'.csv'
+		if self.__append and os.path.exists(self.__segname):
+			# continue a recording after a resume
+			self.__recfile = open(self.__segname,'a')
+		else:
+			self.__recfile = open(self.__segname,'w')
+			self.__recfile.write('Time[s],USET[V],ISET[A],UOUT[V],IOUT[A],POUT[W],UIN[V],PROT,CVCC,calls,Epoch[s],RTT[ms],res,cmt\n')
+		self.__append = False
+		self.__segbytes = 0
+		self.__segrows  = 0
+		self.__segstart = rtime
+		self.__segend	= rtime
+		
+	def __close_segment(self):
+		"""
+			closes the present recording file. With rotation the file is 
+			synced to disk, entered in the index and queued for compression
+		"""
+		if self.__recfile == None: return
+		if not self.__rotating():
 			self.__recfile.close()
-			self.__recname= ''
+			self.__recfile = None
+			return
+		self.__recfile.flush()
+		os.fsync(self.__recfile.fileno())
+		self.__recfile.close()
+		self.__recfile = None
+		fname = self.__segname
+		if self.__compress: 
+			if self.__zipper == None:
+				self.__zipq = queue.Queue()
+				self.__zipper = threading.Thread(target=self.__compressor,name='DPS_Compressor',daemon=True)
+				self.__zipper.start()
+			self.__zipq.put(fname)
+			fname = fname+'.gz'
+		if self.__idxfile == None:
+			iname = 'REC_'+self.__recname+'.idx'
+			if os.path.exists(iname):
+				self.__idxfile = open(iname,'a')
+			else:
+				self.__idxfile = open(iname,'w')
+				self.__idxfile.write('segment,file,start[s],end[s],rows\n')
+		self.__idxfile.write('{:d},{:s},{:5.3f},{:5.3f},{:d}\n'.format(
+							self.__segment,fname,self.__segstart,self.__segend,self.__segrows))
+		self.__idxfile.flush()
+		os.fsync(self.__idxfile.fileno())
+		
+	def __compressor(self):
+		"""
+			background thread: compresses closed segments and removes the 
+			uncompressed file. None in the queue ends the thread
+		"""
+		while True:
+			fname = self.__zipq.get()
+			if fname == None: break
+			try:
+				with open(fname,'rb') as fi, gzip.open(fname+'.gz','wb') as fo:
+					shutil.copyfileobj(fi,fo)
+				os.remove(fname)
+			except OSError as err:
+				print('compression of '+fname+' failed: '+str(err))
+		
+	def end_recording(self):
+		if self.__writer != None:
+			# let the writer finish all queued rows
+			self.__writeq.put(None)
+			self.__writer.join()
+			self.__writer = None
+		self.__close_segment()
+		self.__recname = ''
+		if self.__idxfile != None:
+			self.__idxfile.close()
+			self.__idxfile = None
+		if self.__zipper != None:
+			# wait until all segments are compressed
+			self.__zipq.put(None)
+			self.__zipper.join()
+			self.__zipper = None
+		self.__segment = 0
+		if self.__livefile != None:
+			self.__livefile.close()
+			self.__livefile = None
+		if self.__anchor != None and not self.__dryrun:
+			# compare how far both clocks went since the start
+			(wall,mono) = self.__anchor
+			dt = self.__DH.clock() - mono
+			if dt > 0: self.__drift = ((time() - wall) - dt) / dt * 1e6
+		if self.__cols != None:
+			meta = dict(self.__meta)
+			if self.__anchor != None: meta['clock'] = {'start_epoch':self.__anchor[0],'drift_ppm':self.__drift}
+			meta['deadband'] = {'uout':self.DEADBAND_U,'iout':self.DEADBAND_I}
+			meta['recmode'] = self.__recmode
+			meta['calls'] = self.__calls
+			try:
+				DPS_Export.write_columns('REC_'+self.__colname+'.'+self.__colfmt,self.__cols,meta)
+			except ImportError as err:
+				print('columnar export failed: '+str(err))
+			self.__cols = None
+		if self.__statfile != None:
+			self.__statfile.close()
+			self.__statfile = None
+		self.__anchor = None
+		
+	def get_drift(self):
+		"""
+			returns the drift of the wall clock against the clock of the 
+			readings in ppm over the last recording, None if unknown
+		"""
+		return self.__drift
+
+	def record_summary(self,rtime,summary):
+		"""
+			writes a row with the statistics since the previous call into 
+			the summary file REC_<name>_stats.csv. This only happens while a
+			recording is open
+			
+			rtime   : run time in seconds
+			summary : tuple from DPS_Stats.summary
+		"""
+		if self.__recmode > 0 and self.__recname != '' and not self.__dryrun:
+			if not self.__statfile:
+				sname = 'REC_'+self.__recname+'_stats.csv'
+				if os.path.exists(sname):
+					self.__statfile = open(sname,'a')
+				else:
+					self.__statfile = open(sname,'w')
+					self.__statfile.write('Time[s],calls,Dur[s],N,Vmean[V],Vstd[V],Vmin[V],Vmax[V],'+
+										  'Cmean[A],Cstd[A],Cmin[A],Cmax[A],Pmean[W],Pmax[W],E[Wh],Q[Ah]\n')
+			self.__statfile.write('{:5.3f},{:5d},{:5.3f},{:d},{:.4f},{:.4f},{:.2f},{:.2f},{:.5f},{:.5f},{:.3f},{:.3f},{:.3f},{:.2f},{:.6f},{:.6f}\n'.format(
+							rtime, self.__callcnt, *summary))
+
+	def __write_row(self,data,cres='',ccmt=''):
+		"""
+			writes one row (a __data_xxx tuple) into the recording file and, 
+			if enabled, the live file and the columnar arrays. Starts a new
+			segment when the present one is full
+		"""
+		if self.__recfile == None: self.__open_segment(data[self.RTIME])
+		s = data[self.SAMPLE]
+		line = '{:5.3f},{:04.2f},{:04.3f},{:04.2f},{:04.3f},{:05.2f},{:04.2f},{:2d},{:2d},{:5d},{:.6f},{:.2f},{:3s},{:3s}\n'.format(
+						data[self.RTIME],
+						s.uset,
+						s.iset,
+						s.uout,
+						s.iout,
+						s.pout,
+						s.uin,
+						s.prot,
+						s.cvcc,
+						data[self.CALL],
+						data[self.EPOCH],
+						s.rtt*1000,
+						cres,
+						ccmt)
+		self.__recfile.write(line)
+		self.__segbytes = self.__segbytes + len(line)
+		self.__segrows	= self.__segrows + 1
+		self.__segend	= data[self.RTIME]
+		if self.__cols != None:
+			c = self.__cols
+			c['time'].append(data[self.RTIME])
+			c['uset'].append(s.uset)
+			c['iset'].append(s.iset)
+			c['uout'].append(s.uout)
+			c['iout'].append(s.iout)
+			c['pout'].append(s.pout)
+			c['uin'].append(s.uin)
+			c['prot'].append(s.prot)
+			c['cvcc'].append(s.cvcc)
+			c['calls'].append(data[self.CALL])
+			c['epoch'].append(data[self.EPOCH])
+			c['rtt'].append(s.rtt*1000)
+			if cres != '' or ccmt != '':
+				self.__calls.append([len(c['time'])-1,data[self.CALL],cres,ccmt])
+		if self.__livefile:
+			self.__livefile.write(data[self.RTIME],s.uset,s.iset,
+								  s.uout,s.iout,s.pout,
+								  s.uin,s.prot,s.cvcc,
+								  data[self.CALL])
+		if ((self.__rotbytes > 0 and self.__segbytes >= self.__rotbytes) or
+			(self.__rottime > 0 and self.__segend - self.__segstart >= self.__rottime)):
+			self.__close_segment()
 
 	def do_record(self,rtime, reg = False, callres='',callcmt =''):
 		"""
@@ -93,42 +440,30 @@ class DPS_Recorder:
 			callcmt	: call comment  (if any)
 		"""
 		def write_entry(data,cres='',ccmt=''):
-			self.__recfile.write('{:5.3f},{:04.2f},{:04.3f},{:04.2f},{:04.3f},{:05.2f},{:04.2f},{:2d},{:2d},{:5d},{:3s},{:3s}\n'.format(
-							data[self.RTIME],
-							data[self.USET],
-							data[self.ISET],
-							data[self.UOUT],
-							data[self.IOUT],
-							data[self.POUT],
-							data[self.UIN],
-							data[self.PROT],
-							data[self.CVCC],
-							data[self.CALL],
-							cres,
-							ccmt))
+			self.__enqueue(data,cres,ccmt)
 
 
 		if self.__recmode > 0:
-			if not self.__recfile:
+			if self.__anchor == None: 
+				# the wall clock time of the readings is calculated from here
+				self.__anchor = (time(),self.__DH.clock())
+			if self.__recname == '':
 				#
-				# create a new recording file with a unique name if there isn't one open already
+				# start a new recording with a unique name if there isn't one open already
 				#
 				self.__recname = strftime('%Y%m%d%H%M%S',localtime())
-				self.__recfile = open('REC_'+self.__recname+'.csv','w')
-				self.__recfile.write('Time[s],USET[V],ISET[A],UOUT[V],IOUT[A],POUT[W],UIN[V],PROT,CVCC,calls,res,cmt\n')
+				if self.__colfmt != '' and not self.__dryrun:
+					self.__cols  = DPS_Export.new_columns()
+					self.__calls = []
+					self.__colname = self.__recname
+			if self.__livesize > 0 and self.__livefile == None and not self.__dryrun:
+				# also after resume_recording, which brings the name along
+				self.__livefile = DPS_LiveFile('REC_'+self.__recname+'.live',self.__livesize,time()-rtime)
 			#
-			# assemble a tuple with the latest data
+			# a row is the latest reading with the run time and the calls
 			#
-			data_new = ( rtime,
-						self.__DH.Get_UOUT(),
-						self.__DH.Get_IOUT(),
-						self.__DH.Get_POUT(),
-						self.__DH.Get_UIN(),
-						self.__DH.Get_USET(),
-						self.__DH.Get_ISET(),
-						self.__DH.Get_PROT(),
-						self.__DH.Get_CVCC(),
-						self.__callcnt)
+			s = self.__DH.Get_Sample()
+			data_new = (rtime, s, self.__callcnt, self.__anchor[0] + s.t - self.__anchor[1])
 						
 			
 			if self.__recmode == 1:
@@ -170,9 +505,12 @@ class DPS_Recorder:
 				self.__data_prev = self.__data_now
 				self.__data_now  = data_new
 				
-				if (abs(self.__data_old[self.UOUT] - data_new[self.UOUT]) >= 0.02 or
-				    abs(self.__data_old[self.IOUT] - data_new[self.IOUT]) >= 0.002 or
-					self.__data_old[self.USET:] != data_new[self.USET:] or
+				o = self.__data_old[self.SAMPLE]
+				if (abs(o.uout - s.uout) >= self.DEADBAND_U or
+				    abs(o.iout - s.iout) >= self.DEADBAND_I or
+					o[Sample.USET:Sample.ISET+1] != s[Sample.USET:Sample.ISET+1] or
+					o[Sample.PROT:Sample.CVCC+1] != s[Sample.PROT:Sample.CVCC+1] or
+					self.__data_old[self.CALL] != data_new[self.CALL] or
 					callres !='' or callcmt !=''): 
 					# 
 					# data is different, record it (and possibly the
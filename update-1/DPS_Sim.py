@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+#MIT License
+#
+#Copyright (c) 2019 TheHWcave
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+#
+
+import threading
+from time import perf_counter
+
+class DPS_SimWatchdog:
+	"""
+		Watchdog for dry runs with the same interface as DPS_Watchdog. There
+		is no thread, the polls are modelled by DPS_Sim: they take their 
+		turn on the modelled link every period seconds and check the limits
+		against the modelled output
+	"""
+	
+	__sim		= None
+	__period	= 0.02		# time between polls
+	__limits	= None		# kind -> limit
+	__tstart	= 0.0		# (virtual) time the watchdog started
+	__energy	= 0.0		# energy in Ws since start
+	__tlast		= None		# time of the previous poll
+	__plast		= 0.0		# power of the previous poll
+	__polls		= 0			# number of polls
+	
+	tripped		= None		# event, set when the watchdog turned the output off
+	reason		= ''		# what caused the trip
+	reaction	= 0.0		# reaction time in seconds
+	confirmed	= True		# the modelled module always confirms the power off
+	due			= None		# time of the next poll, None if not running
+	
+	def __init__(self,sim,period=0.02):
+		self.__sim	  = sim
+		self.__period = period
+		self.__limits = {}
+		self.tripped  = threading.Event()
+		
+	def set_limit(self,kind,value): self.__limits[kind] = value
+		
+	def get_limits(self): return dict(self.__limits)
+	
+	def start(self):
+		self.__tstart = self.due = self.__sim.clock()
+		
+	def stop(self):
+		self.due = None
+		
+	def poll(self,treq,t,u,i,p):
+		"""
+			called by DPS_Sim for every poll. treq is the time the request 
+			was sent, t the time the response arrived. Returns a text if a 
+			limit is exceeded or '' if everything is fine
+		"""
+		if self.__tlast != None:
+			self.__energy = self.__energy + (t - self.__tlast) * (p + self.__plast) / 2
+		self.__tlast = t
+		self.__plast = p
+		self.__polls = self.__polls + 1
+		self.due = treq + self.__period
+		lim = self.__limits
+		if 'V' in lim and u > lim['V']: return 'V {:.2f}V > {:.2f}V'.format(u,lim['V'])
+		if 'C' in lim and i > lim['C']: return 'C {:.3f}A > {:.3f}A'.format(i,lim['C'])
+		if 'P' in lim and p > lim['P']: return 'P {:.2f}W > {:.2f}W'.format(p,lim['P'])
+		if 'E' in lim and self.__energy/3600 > lim['E']: return 'E {:.4f}Wh > {:.4f}Wh'.format(self.__energy/3600,lim['E'])
+		if 'T' in lim and treq - self.__tstart > lim['T']: return 'T {:.1f}s > {:.1f}s'.format(treq - self.__tstart,lim['T'])
+		return ''
+		
+	def trip(self,reason,reaction):
+		self.reason = reason
+		self.reaction = reaction
+		self.due = None
+		self.tripped.set()
+		
+	def report(self):
+		"""
+			returns a one line summary of what the watchdog did
+		"""
+		res = '{:d} modelled polls every {:.1f}ms'.format(self.__polls,self.__period*1000)
+		if self.tripped.is_set():
+			res = res + ', tripped on '+self.reason+' reaction time {:.1f}ms'.format(self.reaction*1000)
+		return res
+
+
+class DPS_Sim:
+	"""
+		Modelled DPS module and serial link for dry runs (--dry-run). It 
+		takes the place of DPS_Connection in DPS_Handler and answers the 
+		Modbus requests from a register model of the module driving a 
+		resistive load. 
+		
+		The time is virtual: every transaction moves the clock on by the time
+		the real link would need for it
+		
+			rtt + (request bytes + response bytes) * 10 / baud
+		
+		(a byte is 10 bits on the line with start and stop bit), where rtt is
+		the turnaround time of the module for one frame. attach() gives the 
+		interpreter and the handler this clock, so a program runs as fast as
+		the computer can and afterwards report() shows how long it would take 
+		on the real module and where the time goes.
+	"""
+	
+	SLAVEADD	= 1
+	REG_USET	= 0x00
+	REG_ISET	= 0x01
+	REG_UOUT	= 0x02
+	REG_IOUT	= 0x03
+	REG_POWER	= 0x04
+	REG_UIN		= 0x05
+	REG_PROTECT	= 0x07
+	REG_CV_CC	= 0x08
+	REG_ONOFF	= 0x09
+	REG_MODEL	= 0x0B
+	REG_VERSION	= 0x0C
+	REG_EXTRACT	= 0x23
+	REG_M_USET	= 0x50		# preset group n starts at 0x50 + n*0x10
+	REG_M_SOVP	= 0x52
+	REG_M_SOCP	= 0x53
+	REG_M_SOPP	= 0x54
+	
+	NAMES = {(3,9):'read values', (3,3):'read monitor', (3,2):'read model', (3,10):'sync state',
+			 (3,8):'read preset'}
+	
+	__baud		= 19200
+	__rtt		= 0.0		# turnaround time per frame in seconds
+	__load		= 10.0		# load resistance in ohms
+	__calltime	= 0.0		# modelled duration of a CALL command
+	__regs		= None		# registers of the modelled module
+	__out		= b''		# response waiting to be read
+	__now		= 0.0		# virtual time in seconds
+	__stats		= {}		# what -> [count, seconds]
+	__order		= []		# order in which the entries of __stats were added
+	__wd		= None		# DPS_SimWatchdog, if one was started
+	__wall		= 0.0		# perf_counter() when the sim was attached
+	
+	on_reconnect = None		# never called, there are no outages
+	
+	def __init__(self,baud=19200,rtt=0.015,load=10.0,calltime=1.0,uin=24.0):
+		"""
+			baud	: speed of the modelled link
+			rtt		: turnaround time of the module per frame in seconds
+			load	: resistance of the modelled load in ohms 
+			calltime: seconds a CALL command is assumed to take
+			uin		: input voltage of the module
+		"""
+		self.__baud		= baud
+		self.__rtt		= rtt
+		self.__load		= load
+		self.__calltime = calltime
+		self.__stats	= {}
+		self.__order	= []
+		r = [0]*0x100
+		r[self.REG_UIN]		= round(uin*100)
+		r[self.REG_MODEL]	= 5005
+		r[self.REG_VERSION]	= 14
+		for g in range(10):
+			m = self.REG_M_USET + g*0x10
+			r[m+2:m+5] = [5200,5100,25500]	# OVP, OCP, OPP
+		self.__regs = r
+		
+	#
+	# the interface of DPS_Connection
+	#
+	def open(self): pass
+	def close(self): pass
+	def is_open(self): return True
+	def get_port(self): return 'dry-run'
+	def get_outages(self): return []
+	def retry_delay(self): return 0.0
+		
+	def read(self,n):
+		res = self.__out[:n]
+		self.__out = self.__out[n:]
+		return res
+		
+	def readinto(self,buf):
+		n = min(len(buf),len(self.__out))
+		buf[:n] = self.__out[:n]
+		self.__out = self.__out[n:]
+		return n
+		
+	def write(self,msg):
+		"""
+			answers the request in msg and moves the clock on by the time 
+			the exchange takes
+		"""
+		self.__watch(self.__now)
+		resp = self.__respond(bytes(msg))
+		f = msg[1]
+		if f == 0x03:
+			what = self.NAMES.get((3,msg[5]),'read registers')
+		elif f == 0x06:
+			what = 'write register'
+		else:
+			what = 'write registers'
+		self.__transact(what,len(msg)+len(resp))
+		self.__out = resp
+		return True
+		
+	#
+	# the modelled module
+	#
+	def __crc(self,buf):
+		crc = 0xffff
+		for b in buf:
+			crc = crc ^ b
+			for n in range(8):
+				crc = (crc >> 1) ^ 0xa001 if crc & 1 else crc >> 1
+		return crc.to_bytes(2,'little')
+		
+	def __update(self):
+		"""
+			calculates the output from the settings and the load and trips 
+			the protections like the module does
+		"""
+		r = self.__regs
+		if r[self.REG_ONOFF] and r[self.REG_PROTECT] == 0:
+			uset = r[self.REG_USET] / 100
+			iset = r[self.REG_ISET] / 1000
+			cc = uset > iset * self.__load
+			u = iset * self.__load if cc else uset
+			i = u / self.__load
+			p = u * i
+			if u > r[self.REG_M_SOVP] / 100:	prot = 1
+			elif i > r[self.REG_M_SOCP] / 1000: prot = 2
+			elif p > r[self.REG_M_SOPP] / 100:	prot = 3
+			else:								prot = 0
+			if prot == 0:
+				r[self.REG_UOUT:self.REG_POWER+1] = [round(u*100),round(i*1000),round(p*100)]
+				r[self.REG_CV_CC] = 1 if cc else 0
+				return
+			r[self.REG_PROTECT] = prot
+			r[self.REG_ONOFF] = 0
+		r[self.REG_UOUT:self.REG_POWER+1] = [0,0,0]
+		
+	def __respond(self,msg):
+		"""
+			returns the response of the module to the request msg
+		"""
+		r = self.__regs
+		f = msg[1]
+		reg = int.from_bytes(msg[2:4],'big')
+		val = int.from_bytes(msg[4:6],'big')
+		if f == 0x03:
+			self.__update()
+			body = bytes([msg[0],f,2*val]) + b''.join(v.to_bytes(2,'big') for v in r[reg:reg+val])
+		elif f == 0x06:
+			r[reg] = val
+			if reg == self.REG_ONOFF and val: r[self.REG_PROTECT] = 0
+			if reg == self.REG_EXTRACT:
+				m = self.REG_M_USET + val*0x10
+				r[self.REG_M_USET:self.REG_M_USET+8] = r[m:m+8]
+				r[self.REG_USET:self.REG_ISET+1] = r[m:m+2]
+			body = msg[:6]
+		elif f == 0x10:
+			for n in range(val): r[reg+n] = int.from_bytes(msg[7+2*n:9+2*n],'big')
+			body = msg[:6]
+		else:
+			body = bytes([msg[0],f | 0x80,1])
+		return body + self.__crc(body)
+		
+	#
+	# the virtual clock
+	#
+	def __transact(self,what,nbytes):
+		"""
+			moves the clock on by the time of one exchange of nbytes bytes
+		"""
+		dt = self.__rtt + nbytes * 10 / self.__baud
+		self.__now = self.__now + dt
+		self.__account(what,dt)
+		
+	def __account(self,what,dt):
+		if what not in self.__stats:
+			self.__stats[what] = [0,0.0]
+			self.__order.append(what)
+		s = self.__stats[what]
+		s[0] = s[0] + 1
+		s[1] = s[1] + dt
+		
+	def __watch(self,until):
+		"""
+			does the watchdog polls that are due until then. A poll that 
+			became due while the link was busy goes next
+		"""
+		wd = self.__wd
+		while wd != None and wd.due != None and wd.due <= until:
+			treq = self.__now = max(self.__now,wd.due)
+			self.__update()
+			r = self.__regs
+			self.__transact('watchdog',8+11)
+			reason = wd.poll(treq,self.__now,r[self.REG_UOUT]/100,r[self.REG_IOUT]/1000,r[self.REG_POWER]/100)
+			if reason != '':
+				r[self.REG_ONOFF] = 0
+				self.__transact('watchdog',8+8)
+				wd.trip(reason,self.__now - treq)
+		
+	def clock(self): return self.__now
+	
+	def sleep(self,seconds):
+		"""
+			waits without using the link. Watchdog polls go on meanwhile
+		"""
+		if seconds <= 0: return
+		end = self.__now + seconds
+		self.__watch(end)
+		if end > self.__now:
+			self.__account('waiting',end - self.__now)
+			self.__now = end
+		
+	def system(self,cmd,outfile=''):
+		"""
+			stands in for a CALL command: nothing is run (and no result file
+			written), the command takes the modelled time
+		"""
+		end = self.__now + self.__calltime
+		self.__watch(end)
+		self.__account('call command',max(end - self.__now,0.0))
+		self.__now = max(self.__now,end)
+		return 0
+		
+	def watchdog(self,DH):
+		"""
+			creates the watchdog for the LIMIT instruction, see DPS_SimWatchdog
+		"""
+		self.__wd = DPS_SimWatchdog(self)
+		return self.__wd
+		
+	def attach(self,interpreter):
+		"""
+			makes the interpreter (DPS_Interpreter) and its handler use the
+			virtual clock, the modelled watchdog and CALL commands, and keeps
+			the interpreter from writing files
+		"""
+		interpreter.dryrun		= True
+		interpreter.clock		= self.clock
+		interpreter.sleep		= self.sleep
+		interpreter.system		= self.system
+		interpreter.watchdog	= self.watchdog
+		interpreter.DH.clock	= self.clock
+		self.__wall = perf_counter()
+		
+	def report(self,rows):
+		"""
+			returns the prediction as text: duration, transactions and 
+			recording rows (rows) and a breakdown of where the time goes
+		"""
+		dur = self.__now
+		ntr = sum(s[0] for (w,s) in self.__stats.items() if w not in ('waiting','call command'))
+		lines = ['dry run: predicted duration {:.2f}s, {:d} transactions ({:.1f}/s), {:d} recording rows'.format(
+					dur,ntr,ntr/dur if dur > 0 else 0.0,rows),
+				 'link model: {:d} baud, {:.1f}ms per frame'.format(self.__baud,self.__rtt*1000)]
+		for what in self.__order:
+			(n,t) = self.__stats[what]
+			lines.append('  {:16s}{:8d} {:10.3f}s {:6.1f}%'.format(what,n,t,100*t/dur if dur > 0 else 0.0))
+		if self.__wd != None: lines.append('watchdog: '+self.__wd.report())
+		lines.append('the dry run took {:.2f}s'.format(perf_counter() - self.__wall))
+		return '\n'.join(lines)
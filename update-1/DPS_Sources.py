@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+#MIT License
+#
+#Copyright (c) 2019 TheHWcave
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+#
+
+import threading, queue, math
+from time import perf_counter,localtime,strftime
+
+#
+# Correlated capture from several instruments. Every instrument is a 
+# source with one or more channels. Each polled source runs in its own 
+# thread, so a slow DMM doesn't hold up the others. All samples are time 
+# stamped with perf_counter() at the middle of their request and response
+# and written in time order into one CAP_<date-time>.csv file, one row per
+# sample. The channels of the other sources keep their latest value
+# in that row.
+#
+
+class Source:
+	"""
+		an instrument with channels. read() returns a tuple with one value
+		per channel or None if there was no reading. period is the time 
+		between two polls, 0 = the source is not polled but calls the 
+		capture itself (see DPS_Source)
+	"""
+	name	 = ''
+	channels = ()
+	period	 = 0.0
+	
+	def open(self): pass
+	def close(self): pass
+	def read(self): return None
+	
+
+class DPS_Source(Source):
+	"""
+		the DPS module as a source. It isn't polled: the program already 
+		reads the module all the time, so every Read_Output_Values of the 
+		handler is a sample
+	"""
+	
+	def __init__(self,DH,name='DPS'):
+		self.name	  = name
+		self.channels = (name+'_UOUT[V]',name+'_IOUT[A]',name+'_POUT[W]')
+		self.period	  = 0.0
+		self.__DH	  = DH
+		self.__capture= None
+		
+	def attach(self,capture):
+		self.__capture = capture
+		self.__DH.Add_Listener(self.__sample)
+		
+	def close(self):
+		self.__DH.Remove_Listener(self.__sample)
+		
+	def __sample(self,s):
+		self.__capture.add(self,s.t,(s.uout,s.iout,s.pout))
+		
+
+class SCPI_Source(Source):
+	"""
+		an instrument with a serial SCPI interface (DMM, electronic load ..).
+		Every poll sends the query and reads the answer line, which can have
+		several comma separated values (one per channel)
+	"""
+	
+	def __init__(self,name,port,speed=9600,query='READ?',channels=1,period=0.2):
+		self.name	  = name
+		self.channels = (name,) if channels == 1 else tuple(name+'_'+str(n+1) for n in range(channels))
+		self.period	  = period
+		self.__port	  = port
+		self.__speed  = speed
+		self.__query  = (query+'\n').encode()
+		self.__ser	  = None
+		
+	def open(self):
+		import serial
+		self.__ser = serial.Serial(port=self.__port,baudrate=self.__speed,timeout=1.0)
+		
+	def close(self):
+		if self.__ser != None: 
+			self.__ser.close()
+			self.__ser = None
+		
+	def read(self):
+		self.__ser.write(self.__query)
+		line = self.__ser.readline().decode('ascii','replace').strip()
+		try:
+			values = tuple(float(v) for v in line.split(','))
+		except ValueError:
+			return None
+		if len(values) != len(self.channels): return None
+		return values
+		
+
+class Stub_Source(Source):
+	"""
+		a local source for trying out captures without an instrument. It
+		returns a sine wave with the given amplitude and frequency on each
+		channel 
+	"""
+	
+	def __init__(self,name,channels=1,period=0.1,amplitude=1.0,freq=0.1):
+		self.name	  = name
+		self.channels = (name,) if channels == 1 else tuple(name+'_'+str(n+1) for n in range(channels))
+		self.period	  = period
+		self.__amp	  = amplitude
+		self.__freq	  = freq
+		
+	def read(self):
+		v = self.__amp * math.sin(2 * math.pi * self.__freq * perf_counter())
+		return (v,) * len(self.channels)
+		
+
+class DPS_Capture:
+	"""
+		polls the sources and writes their samples in time order into a
+		CAP_<date-time>.csv file. Samples of different threads can arrive 
+		out of order, so they are held back for holdback seconds and sorted
+		before they are written
+	"""
+	
+	__sources	= []
+	__threads	= []
+	__queue		= None		# (time, source number, values) from the pollers
+	__stop		= None		# event to end the threads
+	__writer	= None
+	__start		= 0.0		# perf_counter() of time 0
+	__end		= None		# perf_counter() at the end of the capture
+	__holdback	= 0.5
+	__counts	= None		# samples per source
+	__errors	= None		# failed reads per source
+	
+	fname		= ''
+	
+	def __init__(self,sources,holdback=0.5):
+		self.__sources	= list(sources)
+		self.__holdback = holdback
+		self.__queue	= queue.Queue()
+		self.__stop		= threading.Event()
+		self.__counts	= [0]*len(self.__sources)
+		self.__errors	= [0]*len(self.__sources)
+		
+	def add(self,source,t,values):
+		"""
+			takes a sample of source that was taken at perf_counter() time t
+		"""
+		self.__queue.put((t,self.__sources.index(source),values))
+		
+	def __poll(self,n):
+		"""
+			poller thread of source n
+		"""
+		src = self.__sources[n]
+		while not self.__stop.is_set():
+			treq = perf_counter()
+			try:
+				values = src.read()
+			except Exception as err:
+				print('capture: '+src.name+' '+str(err))
+				values = None
+			tres = perf_counter()
+			if values != None: self.__queue.put(((treq + tres) / 2,n,values))
+			else:			   self.__errors[n] = self.__errors[n] + 1
+			rest = src.period - (perf_counter() - treq)
+			if rest > 0: self.__stop.wait(rest)
+			
+	def __write(self,f):
+		"""
+			writer thread: sorts the samples and writes the rows
+		"""
+		latest = []
+		for src in self.__sources: latest.extend([''] * len(src.channels))
+		first = [0]
+		for src in self.__sources[:-1]: first.append(first[-1] + len(src.channels))
+		pending = []
+		done = False
+		while not done:
+			try:
+				item = self.__queue.get(timeout=self.__holdback/2)
+				if item == None: done = True
+				else:			 pending.append(item)
+			except queue.Empty: pass
+			if done: 
+				limit = float('inf')
+			else:	 
+				limit = perf_counter() - self.__holdback
+			pending.sort(key=lambda s: s[0])
+			n = 0
+			while n < len(pending) and pending[n][0] <= limit:
+				(t,src,values) = pending[n]
+				latest[first[src]:first[src]+len(values)] = ['{:g}'.format(v) for v in values]
+				f.write('{:.4f},{:s},{:s}\n'.format(t - self.__start,self.__sources[src].name,','.join(latest)))
+				self.__counts[src] = self.__counts[src] + 1
+				n = n + 1
+			del pending[:n]
+		
+	def start(self,fname=''):
+		"""
+			opens the sources and starts the capture into fname (default
+			CAP_<date-time>.csv). Time 0 is now
+		"""
+		if fname == '': fname = 'CAP_'+strftime('%Y%m%d%H%M%S',localtime())+'.csv'
+		self.fname = fname
+		for src in self.__sources: src.open()
+		self.__start = perf_counter()
+		f = open(fname,'w')
+		f.write('Time[s],source,'+','.join(ch for src in self.__sources for ch in src.channels)+'\n')
+		self.__writer = threading.Thread(target=self.__run_writer,args=(f,),name='DPS_Capture',daemon=True)
+		self.__writer.start()
+		self.__threads = []
+		for (n,src) in enumerate(self.__sources):
+			if src.period > 0:
+				th = threading.Thread(target=self.__poll,args=(n,),name='DPS_Source_'+src.name,daemon=True)
+				th.start()
+				self.__threads.append(th)
+			else:
+				src.attach(self)
+				
+	def __run_writer(self,f):
+		with f: self.__write(f)
+		
+	def stop(self):
+		"""
+			ends the capture and closes the sources and the file
+		"""
+		self.__stop.set()
+		for th in self.__threads: th.join()
+		for src in self.__sources: src.close()
+		self.__queue.put(None)
+		self.__writer.join()
+		self.__end = perf_counter()
+		
+	def report(self):
+		"""
+			returns a one line summary of the capture
+		"""
+		dur = (self.__end or perf_counter()) - self.__start
+		return self.fname+': '+', '.join('{:s} {:d} samples ({:.1f}/s, {:d} failed)'.format(
+					src.name,self.__counts[n],self.__counts[n]/dur if dur > 0 else 0.0,self.__errors[n])
+					for (n,src) in enumerate(self.__sources))
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+#MIT License
+#
+#Copyright (c) 2019 TheHWcave
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+#
+
+from math import sqrt, exp
+
+#
+# Streaming statistics. Each of the classes below takes one value at a
+# time and updates its result with a handful of floating point operations,
+# nothing is stored per sample.
+#
+
+class Welford:
+	"""
+		running mean and variance (Welford's method, numerically stable)
+	"""
+	__slots__ = ('n','mean','m2')
+
+	def __init__(self):
+		self.n    = 0
+		self.mean = 0.0
+		self.m2   = 0.0
+
+	def add(self,x):
+		self.n = self.n + 1
+		d = x - self.mean
+		self.mean = self.mean + d / self.n
+		self.m2   = self.m2 + d * (x - self.mean)
+
+	def var(self):
+		if self.n < 2: return 0.0
+		return self.m2 / (self.n - 1)
+
+	def std(self): return sqrt(self.var())
+
+
+class EWMA:
+	"""
+		exponentially weighted moving average with a time constant tau in
+		seconds. The weight of a new value depends on the time since the
+		previous one, so irregular reading intervals are handled correctly
+	"""
+	__slots__ = ('tau','value','tlast')
+
+	def __init__(self,tau=1.0):
+		self.tau   = tau
+		self.value = 0.0
+		self.tlast = None
+
+	def add(self,t,x):
+		if self.tlast == None:
+			self.value = x
+		else:
+			a = 1.0 - exp(-(t - self.tlast) / self.tau)
+			self.value = self.value + a * (x - self.value)
+		self.tlast = t
+
+
+class MinMax:
+	"""
+		running minimum and maximum
+	"""
+	__slots__ = ('min','max')
+
+	def __init__(self):
+		self.min = None
+		self.max = None
+
+	def add(self,x):
+		if self.min == None:
+			self.min = self.max = x
+		elif x < self.min: self.min = x
+		elif x > self.max: self.max = x
+
+
+class Integrator:
+	"""
+		integrates a value over time (trapezoidal rule). The result is in
+		value-seconds, for example Ws for power or As for current
+	"""
+	__slots__ = ('total','tlast','xlast')
+
+	def __init__(self):
+		self.total = 0.0
+		self.tlast = None
+		self.xlast = 0.0
+
+	def add(self,t,x):
+		if self.tlast != None:
+			self.total = self.total + (t - self.tlast) * (x + self.xlast) / 2
+		self.tlast = t
+		self.xlast = x
+
+
+class Channel:
+	"""
+		all statistics for one channel (V, C or P)
+	"""
+	__slots__ = ('w','e','mm')
+
+	def __init__(self,tau):
+		self.w  = Welford()
+		self.e  = EWMA(tau)
+		self.mm = MinMax()
+
+	def add(self,t,x):
+		self.w.add(x)
+		self.e.add(t,x)
+		self.mm.add(x)
+
+
+class Timing:
+	"""
+		timing of the readings: the interval between two readings (its 
+		standard deviation is the jitter) and the round trip time of the 
+		read request. Register add_from with DPS_Handler.Add_Listener to
+		feed it
+	"""
+	__slots__ = ('interval','imm','rtt','rmm','tlast')
+
+	def __init__(self):
+		self.interval = Welford()
+		self.imm	  = MinMax()
+		self.rtt	  = Welford()
+		self.rmm	  = MinMax()
+		self.tlast	  = None
+
+	def add(self,t,rtt):
+		if self.tlast != None:
+			self.interval.add(t - self.tlast)
+			self.imm.add(t - self.tlast)
+		self.tlast = t
+		self.rtt.add(rtt)
+		self.rmm.add(rtt)
+
+	def add_from(self,s): self.add(s.t,s.rtt)
+
+	def text(self):
+		"""
+			short one-line summary for the console trace, times in ms
+		"""
+		if self.interval.n == 0: return 'no readings'
+		return 'interval {:.1f}ms jitter {:.2f}ms ({:.1f}..{:.1f}), rtt {:.1f}ms ({:.1f}..{:.1f})'.format(
+				self.interval.mean*1000,self.interval.std()*1000,self.imm.min*1000,self.imm.max*1000,
+				self.rtt.mean*1000,self.rmm.min*1000,self.rmm.max*1000)
+
+
+class DPS_Stats:
+	"""
+		Statistics of the DPS output channels V (UOUT), C (IOUT) and P (POUT)
+		plus energy (Wh) and charge (Ah). They are kept twice: for the whole
+		run and for the current segment. A segment ends with mark(), the
+		control program does this at each CALL so every call gets a summary
+		of what happened since the previous one.
+
+		Register add_from with DPS_Handler.Add_Listener to feed it
+	"""
+
+	KINDS = ('V','C','P')
+
+	__tau	= 1.0
+	__run	= None		# (channels, energy, charge) for the whole run
+	__seg	= None		# (channels, energy, charge) for the current segment
+	__tstart= 0.0		# time of the first reading
+	__tseg	= 0.0		# time the current segment started
+	__tnow	= 0.0		# time of the last update
+
+	def __new_set(self):
+		return ({k:Channel(self.__tau) for k in self.KINDS}, Integrator(), Integrator())
+
+	def __init__(self,tau=1.0):
+		self.__tau = tau
+		self.__run = self.__new_set()
+		self.__seg = self.__new_set()
+		self.__tstart= 0.0
+		self.__tseg= 0.0
+		self.__tnow= 0.0
+
+	def add(self,t,uout,iout,pout):
+		"""
+			adds one reading taken at time t (seconds)
+		"""
+		first = self.__seg[1].tlast == None		# nothing carried over by mark
+		for s in (self.__run, self.__seg):
+			ch = s[0]
+			ch['V'].add(t,uout)
+			ch['C'].add(t,iout)
+			ch['P'].add(t,pout)
+			s[1].add(t,pout)
+			s[2].add(t,iout)
+		if self.__run[0]['V'].w.n == 1: self.__tstart = t
+		if first: self.__tseg = t
+		self.__tnow = t
+
+	def add_from(self,s):
+		"""
+			listener for DPS_Handler.Add_Listener
+		"""
+		self.add(s.t,s.uout,s.iout,s.pout)
+
+	def value(self,kind,what,segment=False):
+		"""
+			returns a single statistic value
+			kind : 'V', 'C' or 'P' (ignored for energy and charge)
+			what : 'MEAN','STD','MIN','MAX','EWMA','E' (Wh) or 'Q' (Ah)
+		"""
+		s = self.__seg if segment else self.__run
+		if   what == 'E': return s[1].total / 3600
+		elif what == 'Q': return s[2].total / 3600
+		ch = s[0][kind]
+		if   what == 'MEAN': return ch.w.mean
+		elif what == 'STD' : return ch.w.std()
+		elif what == 'EWMA': return ch.e.value
+		elif what == 'MIN' : return ch.mm.min if ch.mm.min != None else 0.0
+		elif what == 'MAX' : return ch.mm.max if ch.mm.max != None else 0.0
+		return 0.0
+
+	def summary(self,segment=False):
+		"""
+			returns a tuple with the statistics:
+			(duration, readings, V mean, V std, V min, V max,
+			 C mean, C std, C min, C max, P mean, P max, Wh, Ah)
+		"""
+		s = self.__seg if segment else self.__run
+		ch = s[0]
+		n  = ch['V'].w.n
+		if n == 0: return (0.0,0) + (0.0,)*12
+		if segment: dur = self.__tnow - self.__tseg
+		else:		dur = self.__tnow - self.__tstart
+		res = (dur, n)
+		for k in ('V','C'):
+			res = res + (ch[k].w.mean, ch[k].w.std(), ch[k].mm.min, ch[k].mm.max)
+		res = res + (ch['P'].w.mean, ch['P'].mm.max, s[1].total/3600, s[2].total/3600)
+		return res
+
+	def mark(self):
+		"""
+			ends the current segment, returns its summary and starts a
+			new segment. The new segment starts at the last reading and 
+			integrates from there, so the interval across the mark is 
+			counted once and the segments add up to the whole run
+		"""
+		res = self.summary(True)
+		seg = self.__new_set()
+		for k in (1,2):
+			seg[k].tlast = self.__seg[k].tlast
+			seg[k].xlast = self.__seg[k].xlast
+		self.__seg = seg
+		self.__tseg = self.__tnow
+		return res
+
+	def text(self,segment=False):
+		"""
+			short one-line summary for the console trace
+		"""
+		s = self.summary(segment)
+		return 'V={:.2f}({:.3f}) C={:.3f}({:.4f}) P={:.2f} {:.4f}Wh {:.4f}Ah'.format(
+				s[2],s[3],s[6],s[7],s[10],s[12],s[13])
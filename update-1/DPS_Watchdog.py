@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+#MIT License
+#
+#Copyright (c) 2019 TheHWcave
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+#
+
+import threading, sys, os
+from time import sleep,perf_counter
+
+class DPS_Watchdog(threading.Thread):
+	"""
+		Software protection that runs in its own thread, independent of the 
+		program interpreter. It polls only UOUT, IOUT and POUT (the shortest
+		read possible) and turns the output off as soon as one of the limits
+		is exceeded. Because it has its own thread it keeps working while the
+		interpreter is busy, for example while a CALL command runs.
+		
+		The DPS handler serializes all messages, so the worst case reaction
+		time is: one poll period + one message of the interpreter that is 
+		already on the line + our read + the power off write. 
+		
+		The reaction time is measured from the moment the read request of 
+		the offending sample was sent until the module confirmed that the
+		output is off. 
+	"""
+
+	KINDS = ('V','C','P','E','T')	# volts, amps, watts, Wh, seconds
+	TRIP_TRIES	= 100		# power off writes before giving up
+	TRIP_WAIT	= 0.01		# seconds between two of them
+
+	__DH		= None
+	__period	= 0.02		# time between polls
+	__limits	= None		# kind -> limit
+	__stop		= None		# event to end the thread
+	__tstart	= 0.0		# time the watchdog started
+	__energy	= 0.0		# energy in Ws since start
+	__tlast		= None		# time of the previous poll
+	__plast		= 0.0		# power of the previous poll
+	__polls		= 0			# number of successful polls
+	__errors	= 0			# number of failed polls
+	__worst		= 0.0		# longest time between two successful polls
+	__switch	= None		# switch interval of the interpreter before start
+	
+	tripped		= None		# event, set when the watchdog turned the output off
+	reason		= ''		# what caused the trip
+	reaction	= 0.0		# reaction time in seconds
+	confirmed	= False		# True if the module confirmed the power off after a trip
+	
+	def __init__(self,DH,period=0.02):
+		threading.Thread.__init__(self,name='DPS_Watchdog',daemon=True)
+		self.__DH 	  = DH
+		self.__period = period
+		self.__limits = {}
+		self.__stop	  = threading.Event()
+		self.tripped  = threading.Event()
+		
+	def set_limit(self,kind,value):
+		"""
+			sets (or changes) a limit. kind is one of KINDS
+		"""
+		self.__limits[kind] = value
+		
+	def get_limits(self): return dict(self.__limits)
+	
+	def start(self):
+		# the shorter switch interval makes sure a busy interpreter thread
+		# gives up the CPU quickly. It applies to the whole process, so 
+		# stop puts the old one back
+		self.__switch = sys.getswitchinterval()
+		sys.setswitchinterval(0.001)
+		threading.Thread.start(self)
+		
+	def stop(self):
+		self.__stop.set()
+		if self.__switch != None:
+			sys.setswitchinterval(self.__switch)
+			self.__switch = None
+		
+	def __trip(self,reason,treq):
+		"""
+			turns the output off. The write is repeated until the module 
+			confirms it, for up to TRIP_TRIES times or until stop. If it 
+			never is, reason says so and there is no reaction time
+		"""
+		for n in range(self.TRIP_TRIES):
+			if self.__DH.Set_Power(0):
+				self.confirmed = True
+				self.reaction = perf_counter() - treq
+				break
+			if self.__stop.wait(self.TRIP_WAIT): break
+		if not self.confirmed: reason = reason+', power off NOT confirmed'
+		self.reason = reason
+		self.tripped.set()
+		
+	def __check(self,treq,s):
+		"""
+			returns a text if a limit is exceeded by the reading s (a Sample)
+			or '' if everything is fine
+		"""
+		lim = self.__limits
+		if 'V' in lim and s.uout > lim['V']: return 'V {:.2f}V > {:.2f}V'.format(s.uout,lim['V'])
+		if 'C' in lim and s.iout > lim['C']: return 'C {:.3f}A > {:.3f}A'.format(s.iout,lim['C'])
+		if 'P' in lim and s.pout > lim['P']: return 'P {:.2f}W > {:.2f}W'.format(s.pout,lim['P'])
+		if 'E' in lim and self.__energy/3600 > lim['E']: return 'E {:.4f}Wh > {:.4f}Wh'.format(self.__energy/3600,lim['E'])
+		if 'T' in lim and treq - self.__tstart > lim['T']: return 'T {:.1f}s > {:.1f}s'.format(treq - self.__tstart,lim['T'])
+		return ''
+		
+	def run(self):
+		# try to get a bit more CPU than the interpreter. Lowering the 
+		# niceness needs privileges, so this may well fail, which is fine.
+		try:
+			os.setpriority(os.PRIO_PROCESS,threading.get_native_id(),-10)
+		except (AttributeError,OSError): pass
+		
+		self.__tstart = perf_counter()
+		while not self.__stop.is_set() and not self.tripped.is_set():
+			treq = perf_counter()
+			s = self.__DH.Read_Monitor_Values()
+			if s:
+				t = perf_counter()
+				p = s.pout
+				if self.__tlast != None:
+					self.__energy = self.__energy + (t - self.__tlast) * (p + self.__plast) / 2
+					self.__worst = max(self.__worst, t - self.__tlast)
+				self.__tlast = t
+				self.__plast = p
+				self.__polls = self.__polls + 1
+				reason = self.__check(treq,s)
+				if reason != '':
+					self.__trip(reason,treq)
+					break
+			else:
+				self.__errors = self.__errors + 1
+			rest = self.__period - (perf_counter() - treq)
+			if rest > 0: self.__stop.wait(rest)
+			
+	def report(self):
+		"""
+			returns a one line summary of what the watchdog did
+		"""
+		if self.__polls > 1 and self.__tlast != None:
+			avg = (self.__tlast - self.__tstart) / (self.__polls - 1)
+		else:
+			avg = 0.0
+		res = '{:d} polls ({:d} failed), avg {:.1f}ms, worst gap {:.1f}ms'.format(
+				self.__polls,self.__errors,avg*1000,self.__worst*1000)
+		if self.tripped.is_set() and self.confirmed:
+			res = res + ', tripped on '+self.reason+' reaction time {:.1f}ms'.format(self.reaction*1000)
+		elif self.tripped.is_set():
+			res = res + ', tripped on '+self.reason
+		return res